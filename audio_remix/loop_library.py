@@ -0,0 +1,84 @@
+"""
+Decoded drum loops, cached per sample rate.
+
+Each loop is decoded/resampled once into `<VIRAL_CACHE_DIR>/loops/loop_<key>.npy`
+(key = path, size, mtime, sr) and reopened with mmap_mode="r", so jobs that
+reuse the same house/jedag loops skip decoding entirely; within a process the
+mapped arrays are memoized.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import os
+import threading
+import numpy as np
+
+from ml.audio_io import load_pcm
+from ml.feature_cache import CACHE_DIR
+
+LOOP_CACHE_DIR = CACHE_DIR / "loops"
+
+
+class LoopLibrary:
+    def __init__(self, cache_dir: str | Path | None = None):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else LOOP_CACHE_DIR
+        self._lock = threading.Lock()
+        self._mem = {}
+
+    def _key(self, path: str, sr: int) -> str:
+        st = os.stat(path)
+        raw = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{int(sr)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, path: str, sr: int) -> np.ndarray:
+        """Mono float32 loop at `sr`, memory-mapped read-only."""
+        key = self._key(path, sr)
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                return hit
+            npy = self.cache_dir / f"loop_{key[:20]}.npy"
+            try:
+                loop = np.load(npy, mmap_mode="r")
+            except (OSError, ValueError):
+                loop = None
+            if loop is None:
+                y, _ = load_pcm(path, sr=sr)
+                y = np.ascontiguousarray(y, dtype=np.float32)
+                try:
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    # per-process/thread temp name: concurrent jobs may decode the same loop
+                    tmp = npy.with_name(f"{npy.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+                    np.save(tmp, y)
+                    os.replace(tmp, npy)
+                    loop = np.load(npy, mmap_mode="r")
+                except (OSError, ValueError):
+                    loop = y  # read-only cache dir or unreadable entry: keep it in memory only
+            self._mem[key] = loop
+            return loop
+
+
+def mix_loop(y: np.ndarray, loop: np.ndarray, gain: float) -> np.ndarray:
+    """
+    y + gain * loop repeated to len(y), added in place one loop period at a
+    time (no full-length tiled copy). `y` must be writable float32.
+    """
+    n = len(loop)
+    if n == 0 or len(y) == 0:
+        return y
+    scaled = np.multiply(loop, np.float32(gain), dtype=np.float32)
+    for a in range(0, len(y), n):
+        b = min(len(y), a + n)
+        y[a:b] += scaled[:b - a]
+    return y
+
+
+_library = None
+
+
+def default_library() -> LoopLibrary:
+    global _library
+    if _library is None:
+        _library = LoopLibrary()
+    return _library
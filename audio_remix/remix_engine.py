@@ -1,11 +1,23 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import BinaryIO, Callable
+import hashlib
+import json
 import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
 import numpy as np
 import soundfile as sf
 import librosa
+from audio_remix.loop_library import LoopLibrary, default_library, mix_loop
+from ml.audio_asset import AudioAsset
+from ml.feature_cache import CACHE_DIR, file_digest
 try:
     import scipy.signal
 except Exception:
@@ -35,55 +47,207 @@ class RemixPlan:
     out_sr: int = 44100
 
 
+@dataclass
+class RemixStream:
+    """
+    A remix as a mux input: either a cached render on disk (`path`) or a
+    deferred render (`render(sink)`) that writes raw mono f32le PCM at `sr`
+    into a binary sink such as an ffmpeg process's stdin and returns the
+    debug info. See AudioRemixEngine.stream_many.
+    """
+    sr: int
+    dbg: dict
+    path: str | None = None
+    render: Callable[[BinaryIO], dict] | None = None
+
+    def ffmpeg_input(self) -> list[str]:
+        if self.path:
+            return ["-i", self.path]
+        return ["-f", "f32le", "-ar", str(self.sr), "-ac", "1", "-i", "pipe:0"]
+
+
+def _tmp_path(path: Path) -> Path:
+    # per-process/thread temp name: concurrent jobs may render the same cache key
+    return path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp{path.suffix}")
+
+
+def _publish(tmp: Path, dest: Path):
+    """os.replace `tmp` onto `dest`; if that fails but another job already published `dest`, keep theirs."""
+    try:
+        os.replace(tmp, dest)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        if not dest.exists():
+            raise
+
+
+_evict_lock = threading.Lock()
+
+
+def _evict_renders(cache_dir: Path, keep: Path | None = None):
+    """Drop least recently used renders (mtime, bumped on hits) until under REMIX_CACHE_MAX_BYTES."""
+    with _evict_lock:
+        entries = []
+        for wav in cache_dir.glob("remix_*.wav"):
+            if ".tmp" in wav.name:
+                continue  # another job's render in progress
+            sidecar = wav.with_suffix(".json")
+            try:
+                st = wav.stat()
+                size = st.st_size + (sidecar.stat().st_size if sidecar.exists() else 0)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, size, wav))
+        total = sum(size for _, size, _ in entries)
+        if total <= REMIX_CACHE_MAX_BYTES:
+            return
+        for _, size, wav in sorted(entries, key=lambda r: r[0]):
+            if keep is not None and wav == keep:
+                continue
+            try:
+                wav.unlink()  # WAV first: _cached needs both files, so the entry is gone at once
+            except OSError:
+                continue  # still open elsewhere (Windows) or already gone
+            try:
+                wav.with_suffix(".json").unlink()
+            except OSError:
+                pass
+            total -= size
+            if total <= REMIX_CACHE_MAX_BYTES:
+                break
+
+
+class _CacheTee:
+    """
+    Binary sink for a streamed render: forwards the raw f32le PCM to the mux
+    and also writes it to the render cache under a per-process temp name,
+    renamed into place (with its sidecar) only once the render completes.
+    If the mux stops reading early (-shortest), the render still runs to the
+    end so the cached WAV is whole.
+    """
+
+    def __init__(self, sink: BinaryIO, out_audio: Path, sr: int):
+        self.sink = sink
+        self.out_audio = out_audio
+        self.tmp = out_audio.with_name(f"{out_audio.stem}.{os.getpid()}.{threading.get_ident()}.tmp.wav")
+        self.sink_open = True
+        try:
+            out_audio.parent.mkdir(parents=True, exist_ok=True)
+            self._wav = sf.SoundFile(str(self.tmp), "w", samplerate=sr, channels=1, format="WAV")
+        except (OSError, RuntimeError):
+            self._wav = None  # read-only cache dir: stream only
+
+    def write(self, data) -> int:
+        if self._wav is not None:
+            self._wav.write(np.frombuffer(data, dtype=np.float32))
+        if self.sink_open:
+            try:
+                self.sink.write(data)
+            except BrokenPipeError:
+                self.sink_open = False
+                if self._wav is None:
+                    raise
+        return len(data)
+
+    def flush(self):
+        if self.sink_open:
+            self.sink.flush()
+
+    def commit(self, engine: "AudioRemixEngine", dbg: dict) -> dict:
+        if self._wav is None:
+            return dbg
+        self._wav.close()
+        dbg = {**dbg, "out_audio": str(self.out_audio)}
+        try:
+            os.replace(self.tmp, self.out_audio)
+            engine._write_sidecar(self.out_audio, {k: v for k, v in dbg.items() if k != "streamed"})
+        except OSError:
+            self.abort()
+        return dbg
+
+    def abort(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+        try:
+            os.unlink(self.tmp)
+        except OSError:
+            pass
+
+
+# bump when rendering changes (invalidates cached remix WAVs)
+REMIX_RENDER_VERSION = "2"
+REMIX_CACHE_DIR = CACHE_DIR / "remix"
+# byte budget for cached renders (WAV + sidecar), least recently used evicted first
+REMIX_CACHE_MAX_BYTES = int(float(os.getenv("REMIX_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+REMIX_WORKERS = int(os.getenv("REMIX_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+# samples per block for the streaming EQ / limiter (bounds temporary memory)
+REMIX_BLOCK_SIZE = int(os.getenv("REMIX_BLOCK_SIZE", "65536"))
+# pick the window on a low-rate envelope, then decode only that window at out_sr
+REMIX_TWO_PASS = os.getenv("REMIX_TWO_PASS", "1") != "0"
+# "numpy" (reference) or "ffmpeg" (whole plan as one filter graph)
+REMIX_BACKEND = os.getenv("REMIX_BACKEND", "numpy")
+# main.py: render remixes straight into the final ffmpeg mux (stream_many) instead of cached WAVs
+REMIX_STREAM = os.getenv("REMIX_STREAM", "1") != "0"
+
+
 class AudioRemixEngine:
     """
     Single-track remix/edit engine for short-form platforms.
     Works without stems: best-cut + mild tempo shift + EQ + limiter + optional loop overlay.
+    `two_pass` (default REMIX_TWO_PASS) picks segments from the asset's cheap
+    low-rate envelope and decodes only the chosen range at plan.out_sr, so
+    render time and memory don't grow with the length of the upload.
+    `backend="ffmpeg"` renders each plan as one ffmpeg filter graph (see
+    _render_ffmpeg); the NumPy path stays the reference and the fallback.
     """
 
-    def load(self, audio_path: str, sr: int = 44100):
-        y, sr = librosa.load(audio_path, sr=sr, mono=True)
-        return y.astype(np.float32), sr
-
-    def detect_bpm(self, y: np.ndarray, sr: int) -> float:
-        """
-        Use a lighter-weight BPM detection to avoid large memory use on long audio.
-        Downsample and analyze only the first ~60s.
-        """
-        # limit to 60s to reduce memory
-        max_sec = 60.0
-        max_len = int(max_sec * sr)
-        y_seg = y[:max_len]
-        # downsample for beat tracking
-        target_sr = 22050
-        if sr != target_sr:
-            y_seg = librosa.resample(y_seg, orig_sr=sr, target_sr=target_sr)
-            sr = target_sr
-        tempo, _ = librosa.beat.beat_track(y=y_seg, sr=sr)
-        return float(tempo) if tempo and tempo > 0 else 120.0
-
-    def pick_best_segment(self, y: np.ndarray, sr: int, duration_sec: float) -> tuple[float, float]:
+    def __init__(
+        self,
+        two_pass: bool | None = None,
+        backend: str | None = None,
+        loops: LoopLibrary | None = None,
+    ):
+        self.two_pass = REMIX_TWO_PASS if two_pass is None else bool(two_pass)
+        self.loops = loops or default_library()
+        self.backend = backend or REMIX_BACKEND
+        if self.backend == "ffmpeg" and shutil.which("ffmpeg") is None:
+            self.backend = "numpy"
+
+    def rms_envelope(self, y: np.ndarray, sr: int, hop: int = 512, frame: int = 2048) -> np.ndarray:
+        return librosa.feature.rms(y=y, frame_length=frame, hop_length=hop)[0]
+
+    def pick_best_segment(
+        self, y: np.ndarray, sr: int, duration_sec: float, rms: np.ndarray | None = None
+    ) -> tuple[float, float]:
         """
         Simple 'most energetic window' picker using RMS energy.
+        Pass a precomputed `rms` envelope (hop 512) to reuse it across durations.
         """
         hop = 512
-        frame = 2048
-        rms = librosa.feature.rms(y=y, frame_length=frame, hop_length=hop)[0]
-        times = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop)
-
-        win = max(1, int(duration_sec / (hop / sr)))
+        if rms is None:
+            rms = self.rms_envelope(y, sr, hop=hop)
+        return self.best_window(rms, sr / float(hop), len(y) / sr, duration_sec)
+
+    def best_window(
+        self, rms: np.ndarray, frames_per_sec: float, total_sec: float, duration_sec: float
+    ) -> tuple[float, float]:
+        """Most energetic `duration_sec` window of an RMS envelope."""
+        win = max(1, int(duration_sec * frames_per_sec))
         if len(rms) <= win:
-            return 0.0, min(duration_sec, len(y) / sr)
+            return 0.0, min(duration_sec, total_sec)
 
         # rolling sum energy
         csum = np.cumsum(rms)
         sums = csum[win:] - csum[:-win]
         best_i = int(np.argmax(sums))
-        start_t = float(times[best_i])
+        start_t = best_i / frames_per_sec
         end_t = start_t + duration_sec
-        max_t = len(y) / sr
-        if end_t > max_t:
-            end_t = max_t
+        if end_t > total_sec:
+            end_t = total_sec
             start_t = max(0.0, end_t - duration_sec)
         return start_t, end_t
 
@@ -104,78 +268,117 @@ class AudioRemixEngine:
     def _db_to_gain(self, db: float) -> float:
         return float(10 ** (db / 20.0))
 
-    def eq_simple(self, y: np.ndarray, sr: int, bass_db: float, presence_db: float) -> np.ndarray:
+    def eq_stream(
+        self, y: np.ndarray, sr: int, bass_db: float, presence_db: float, block_size: int = REMIX_BLOCK_SIZE
+    ) -> float:
         """
-        Approx EQ: low-shelf-ish boost + gentle presence.
-        Uses 2 filters: low-shelf approximation with lowpass + mix, and peaking-ish via bandpass mix.
+        Approx EQ: low-shelf-ish boost (~120 Hz lowpass mixed back in) plus a
+        gentle presence lift (1.8-3.8 kHz bandpass mixed back in), applied in
+        place to float32 `y` block by block. Filters are SOS sections whose
+        state (zi) carries over between blocks, so only block-sized float64
+        temporaries exist. Returns the peak |y| after EQ (first pass of the
+        limiter).
         """
+        peak = 0.0
         if scipy is None:
             # Fallback: skip EQ if scipy is unavailable
-            return y.astype(np.float32)
-        y = y.astype(np.float32)
-
-        # Lowpass for bass region (~120 Hz)
-        cutoff_bass = 120.0 / (sr / 2.0)
-        b_lp, a_lp = scipy.signal.butter(2, cutoff_bass, btype="low")
-        bass = scipy.signal.lfilter(b_lp, a_lp, y)
-
+            for a in range(0, len(y), block_size):
+                peak = max(peak, float(np.max(np.abs(y[a:a + block_size]), initial=0.0)))
+            return peak
+
+        sos_lp = scipy.signal.butter(2, 120.0 / (sr / 2.0), btype="low", output="sos")
+        sos_bp = scipy.signal.butter(2, [1800.0 / (sr / 2.0), 3800.0 / (sr / 2.0)], btype="band", output="sos")
+        zi_lp = np.zeros((sos_lp.shape[0], 2))
+        zi_bp = np.zeros((sos_bp.shape[0], 2))
         bass_gain = self._db_to_gain(bass_db) - 1.0
-        y = y + bass_gain * bass
-
-        # Presence band (~2.5 kHz)
-        low = 1800.0 / (sr / 2.0)
-        high = 3800.0 / (sr / 2.0)
-        b_bp, a_bp = scipy.signal.butter(2, [low, high], btype="band")
-        pres = scipy.signal.lfilter(b_bp, a_bp, y)
-
         pres_gain = self._db_to_gain(presence_db) - 1.0
-        y = y + pres_gain * pres
-
-        return y.astype(np.float32)
 
-    def limiter(self, y: np.ndarray, ceiling: float = 0.98) -> np.ndarray:
+        for a in range(0, len(y), block_size):
+            block = y[a:a + block_size]
+            bass, zi_lp = scipy.signal.sosfilt(sos_lp, block, zi=zi_lp)
+            bass *= bass_gain
+            block += bass
+            pres, zi_bp = scipy.signal.sosfilt(sos_bp, block, zi=zi_bp)
+            pres *= pres_gain
+            block += pres
+            peak = max(peak, float(np.max(np.abs(block), initial=0.0)))
+        return peak
+
+    def limiter_stream(
+        self,
+        y: np.ndarray,
+        sr: int,
+        out_path: str,
+        peak: float,
+        ceiling: float = 0.98,
+        block_size: int = REMIX_BLOCK_SIZE,
+    ):
         """
-        Simple soft limiter: normalize + tanh saturation + ceiling clamp.
+        Second limiter pass, a simple soft limiter: normalize by `peak`, tanh
+        saturation (2.2x drive), ceiling clamp. Applied in place per block and
+        streamed to `out_path` (a WAV path, or a binary sink that receives raw
+        mono f32le PCM).
         """
-        y = y.astype(np.float32)
-        peak = float(np.max(np.abs(y)) + 1e-9)
-        y = y / peak  # normalize to 1
-        y = np.tanh(2.2 * y)  # soft clip
-        y = np.clip(y, -ceiling, ceiling)
-        return y.astype(np.float32)
+        scale = np.float32(2.2 / (peak + 1e-9))
+
+        def blocks():
+            for a in range(0, len(y), block_size):
+                block = y[a:a + block_size]
+                block *= scale
+                np.tanh(block, out=block)
+                np.clip(block, -ceiling, ceiling, out=block)
+                yield block
+
+        if hasattr(out_path, "write"):
+            for block in blocks():
+                out_path.write(block.tobytes())
+            return
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        with sf.SoundFile(out_path, "w", samplerate=sr, channels=1, format="WAV") as f:
+            for block in blocks():
+                f.write(block)
 
     def overlay_loop(self, y: np.ndarray, sr: int, loop_path: str, mix_db: float) -> np.ndarray:
-        loop, loop_sr = librosa.load(loop_path, sr=sr, mono=True)
-        loop = loop.astype(np.float32)
+        # decoded once per (loop file, sr) into the mmap'd loop library
+        loop = self.loops.get(loop_path, sr)
 
         if len(loop) == 0:
             return y
 
-        # tile loop to match length
-        reps = int(np.ceil(len(y) / len(loop)))
-        tiled = np.tile(loop, reps)[:len(y)]
-
         mix = self._db_to_gain(mix_db)  # negative db => quieter
-        return (y + mix * tiled).astype(np.float32)
+        return mix_loop(np.array(y, dtype=np.float32), loop, mix)
 
-    def save(self, y: np.ndarray, sr: int, out_path: str):
-        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-        sf.write(out_path, y, sr)
+    def source_bpm(self, asset: AudioAsset) -> float:
+        """BPM already tracked on the shared asset (120 if tracking found none)."""
+        tempo = asset.tempo
+        return tempo if tempo > 0 else 120.0
 
-    def apply(self, audio_path: str, plan: RemixPlan, target_duration_sec: float) -> tuple[str, dict]:
+    def _cache_key(self, digest: str, plan: RemixPlan, target_duration_sec: float) -> str:
+        fields = asdict(plan)
+        if plan.drum_loop_path:
+            # the loop file's content matters, not its name
+            fields["drum_loop_path"] = file_digest(plan.drum_loop_path)
+        raw = json.dumps(
+            [REMIX_RENDER_VERSION, digest, fields, float(target_duration_sec), self.two_pass, self.backend],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _render(
+        self,
+        y_seg: np.ndarray,
+        sr: int,
+        start_sec: float,
+        end_sec: float,
+        src_bpm: float,
+        plan: RemixPlan,
+        out_audio: Path | BinaryIO,
+    ) -> dict:
         """
-        Returns (out_audio_path, debug_info)
+        Render a segment to the cached WAV `out_audio`, or, given a binary
+        sink, stream it as raw f32le PCM without touching the disk.
         """
-        y, sr = self.load(audio_path, sr=plan.out_sr)
-        src_bpm = self.detect_bpm(y, sr)
-
-        # Segment selection
-        if plan.start_sec is None or plan.end_sec is None:
-            start_sec, end_sec = self.pick_best_segment(y, sr, target_duration_sec)
-        else:
-            start_sec, end_sec = plan.start_sec, plan.end_sec
-
-        y_seg = self.crop(y, sr, start_sec, end_sec)
 
         # Tempo (small changes only)
         if plan.target_bpm:
@@ -185,19 +388,338 @@ class AudioRemixEngine:
         if plan.drum_loop_path:
             y_seg = self.overlay_loop(y_seg, sr, plan.drum_loop_path, plan.drum_mix_db)
 
-        # EQ + limiter
-        y_seg = self.eq_simple(y_seg, sr, plan.bass_boost_db, plan.presence_boost_db)
-        y_seg = self.limiter(y_seg, plan.limiter_ceiling)
-
-        out_base = Path(os.getenv("OUTPUT_DIR", "outputs"))
-        out_audio = str(out_base / f"audio_adapted_{int(target_duration_sec)}s.wav")
-        self.save(y_seg, sr, out_audio)
-
         dbg = {
             "src_bpm": src_bpm,
             "segment": {"start_sec": start_sec, "end_sec": end_sec},
             "target_bpm": plan.target_bpm,
             "out_sr": sr,
-            "out_audio": out_audio,
+            "out_audio": str(out_audio),
         }
-        return out_audio, dbg
+        # EQ + limiter, streamed block by block (y_seg is our own float32 copy);
+        # written under a temp name, the WAV + sidecar only appear once complete
+        y_seg = np.require(y_seg, dtype=np.float32, requirements=["C", "W"])
+        peak = self.eq_stream(y_seg, sr, plan.bass_boost_db, plan.presence_boost_db)
+        if hasattr(out_audio, "write"):
+            self.limiter_stream(y_seg, sr, out_audio, peak, plan.limiter_ceiling)
+            dbg["out_audio"] = None
+            dbg["streamed"] = True
+            return dbg
+        tmp = _tmp_path(out_audio)
+        self.limiter_stream(y_seg, sr, str(tmp), peak, plan.limiter_ceiling)
+        _publish(tmp, out_audio)
+        self._write_sidecar(out_audio, dbg)
+        return dbg
+
+    def _write_sidecar(self, out_audio: Path, dbg: dict):
+        sidecar = out_audio.with_suffix(".json")
+        tmp = _tmp_path(sidecar)
+        tmp.write_text(json.dumps(dbg), encoding="utf-8")
+        _publish(tmp, sidecar)
+        # the entry is complete: keep the cache within its budget
+        _evict_renders(out_audio.parent, keep=out_audio)
+
+    def _ffmpeg_graph(
+        self, duration: float, src_bpm: float, plan: RemixPlan, norm_gain: float | None
+    ) -> str:
+        """
+        RemixPlan as a filter graph, same stage order as _render:
+        atrim -> atempo -> drum loop amix -> bass/equalizer EQ -> limiter.
+        With norm_gain None the graph ends after EQ with astats (peak pass;
+        volumedetect would measure after an s16 conversion that clips overs).
+        """
+        main = [
+            f"atrim=0:{duration:.6f}",
+            "asetpts=N/SR/TB",
+            f"aresample={plan.out_sr}",
+            "aformat=sample_fmts=flt:channel_layouts=mono",
+        ]
+        if plan.target_bpm and plan.target_bpm > 0:
+            rate = float(np.clip(plan.target_bpm / max(src_bpm, 1e-6),
+                                 1.0 - plan.max_time_stretch, 1.0 + plan.max_time_stretch))
+            main.append(f"atempo={rate:.6f}")
+        chains = ["[0:a]" + ",".join(main) + "[m]"]
+        head = "[m]"
+        if plan.drum_loop_path:
+            loop_gain = self._db_to_gain(plan.drum_mix_db)
+            chains.append(
+                f"[1:a]aresample={plan.out_sr},aformat=sample_fmts=flt:channel_layouts=mono,"
+                f"volume={loop_gain:.6f}[l]"
+            )
+            chains.append("[m][l]amix=inputs=2:duration=first:normalize=0[x]")
+            head = "[x]"
+        post = [
+            # low-shelf for the lowpass-mix bass boost, ~1 octave peak for the 1.8-3.8 kHz presence mix
+            f"bass=g={plan.bass_boost_db:.3f}:f=120:t=q:w=0.707",
+            f"equalizer=f=2600:t=o:w=1.1:g={plan.presence_boost_db:.3f}",
+        ]
+        if norm_gain is None:
+            post.append("astats=measure_perchannel=none:measure_overall=Peak_level")
+        else:
+            # limiter_stream(): normalize to peak, tanh(2.2 x), clamp at the ceiling
+            post += [
+                f"volume={2.2 * norm_gain:.6f}",
+                "asoftclip=type=tanh",
+                f"alimiter=limit={plan.limiter_ceiling:.4f}:level=disabled:latency=1",
+            ]
+        chains.append(head + ",".join(post) + "[out]")
+        return ";".join(chains)
+
+    def _render_ffmpeg(
+        self,
+        audio_path: str,
+        start_sec: float,
+        end_sec: float,
+        src_bpm: float,
+        plan: RemixPlan,
+        out_audio: Path | BinaryIO,
+    ) -> dict:
+        """
+        Whole plan in ffmpeg: the segment is seeked to (-ss), never decoded
+        into Python. Two short invocations: a peak pass (astats) for the
+        limiter's normalization, then the render to WAV, or, given a binary
+        sink with a file descriptor, raw f32le PCM written straight into it.
+        """
+        duration = max(0.0, end_sec - start_sec)
+        inputs = ["-ss", f"{max(0.0, start_sec):.6f}", "-i", audio_path]
+        if plan.drum_loop_path:
+            inputs += ["-stream_loop", "-1", "-i", plan.drum_loop_path]
+        base = ["ffmpeg", "-nostdin", "-hide_banner"]
+
+        probe = subprocess.run(
+            base + ["-v", "info"] + inputs
+            + ["-filter_complex", self._ffmpeg_graph(duration, src_bpm, plan, None),
+               "-map", "[out]", "-f", "null", "-"],
+            capture_output=True, text=True,
+        )
+        m = re.findall(r"Peak level dB:\s*(-?[\d.]+|-inf)", probe.stderr)
+        peak_db = float(m[-1]) if m and m[-1] != "-inf" else 0.0
+        norm_gain = 10 ** (-peak_db / 20.0)
+
+        render = base + ["-v", "error", "-y"] + inputs + [
+            "-filter_complex", self._ffmpeg_graph(duration, src_bpm, plan, norm_gain),
+            "-map", "[out]", "-ar", str(plan.out_sr), "-ac", "1",
+        ]
+        dbg = {
+            "src_bpm": src_bpm,
+            "segment": {"start_sec": start_sec, "end_sec": end_sec},
+            "target_bpm": plan.target_bpm,
+            "out_sr": plan.out_sr,
+            "out_audio": str(out_audio),
+            "backend": "ffmpeg",
+        }
+
+        if hasattr(out_audio, "write"):
+            with tempfile.TemporaryFile() as err:
+                proc = subprocess.Popen(
+                    render + ["-c:a", "pcm_f32le", "-f", "f32le", "pipe:1"],
+                    stdout=subprocess.PIPE, stderr=err,
+                )
+                try:
+                    while True:
+                        buf = proc.stdout.read(4 * REMIX_BLOCK_SIZE)
+                        if not buf:
+                            break
+                        out_audio.write(buf)
+                except BaseException:
+                    proc.kill()
+                    raise
+                finally:
+                    proc.stdout.close()
+                    proc.wait()
+                if proc.returncode != 0:
+                    err.seek(0)
+                    msg = err.read().decode("utf-8", "replace").strip()[-400:]
+                    raise RuntimeError(f"ffmpeg remix failed: {msg}")
+            dbg["out_audio"] = None
+            dbg["streamed"] = True
+            return dbg
+
+        tmp = _tmp_path(out_audio)
+        p = subprocess.run(
+            render + ["-c:a", "pcm_s16le", str(tmp)],
+            capture_output=True, text=True,
+        )
+        if p.returncode != 0:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise RuntimeError(f"ffmpeg remix failed: {p.stderr.strip()[-400:]}")
+        _publish(tmp, out_audio)
+        self._write_sidecar(out_audio, dbg)
+        return dbg
+
+    def _cached(self, out_audio: Path) -> dict | None:
+        """Debug info of a finished cached render, or None."""
+        sidecar = out_audio.with_suffix(".json")
+        if not (out_audio.exists() and sidecar.exists()):
+            return None
+        try:
+            dbg = json.loads(sidecar.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(out_audio)  # LRU clock
+        except OSError:
+            pass
+        dbg["out_audio"] = str(out_audio)
+        dbg["cached"] = True
+        return dbg
+
+    def apply_many(
+        self,
+        audio: str | AudioAsset,
+        jobs: list[tuple[RemixPlan, float]],
+        workers: int | None = None,
+        cache_dir: str | Path | None = None,
+    ) -> list[tuple[str, dict]]:
+        """
+        Render several (plan, target_duration_sec) jobs for one song.
+        Load (or, in two-pass mode, the low-rate envelope), BPM and the RMS
+        envelope are shared; renders run in a thread pool.
+        Outputs are cached by (audio content hash, plan fields, duration) as
+        `<cache_dir>/remix_<key>.wav`, so reruns with the same song and presets
+        return at once and platforms never overwrite each other's audio.
+        Returns [(out_audio_path, debug_info), ...] in job order.
+        """
+        asset = audio if isinstance(audio, AudioAsset) else AudioAsset(audio)
+        out_dir = Path(cache_dir) if cache_dir is not None else REMIX_CACHE_DIR
+        out_dir.mkdir(parents=True, exist_ok=True)
+        digest = file_digest(asset.path)
+
+        results = [None] * len(jobs)
+        pending = {}  # key -> (plan, duration, out path, job indices)
+        for i, (plan, dur) in enumerate(jobs):
+            key = self._cache_key(digest, plan, dur)
+            out_audio = out_dir / f"remix_{key[:20]}.wav"
+            if key not in pending:
+                dbg = self._cached(out_audio)
+                if dbg is not None:
+                    results[i] = (str(out_audio), dbg)
+                    continue
+            pending.setdefault(key, (plan, dur, out_audio, []))[3].append(i)
+
+        if pending:
+            shared = {}
+            if self.two_pass or self.backend == "ffmpeg":
+                # pass 1: windows from the low-rate envelope (cached with the features)
+                env, env_rate, total_sec = asset.envelope()
+            else:
+                for sr in sorted({plan.out_sr for plan, _, _, _ in pending.values()}):
+                    y = asset.samples(sr)
+                    shared[sr] = (y, self.rms_envelope(y, sr))
+            src_bpm = self.source_bpm(asset)
+
+            def run(item):
+                plan, dur, out_audio, _ = item
+                sr = plan.out_sr
+                if self.backend == "ffmpeg":
+                    if plan.start_sec is not None and plan.end_sec is not None:
+                        start_sec, end_sec = plan.start_sec, plan.end_sec
+                    else:
+                        start_sec, end_sec = self.best_window(env, env_rate, total_sec, dur)
+                    try:
+                        return self._render_ffmpeg(asset.path, start_sec, end_sec, src_bpm, plan, out_audio)
+                    except (OSError, RuntimeError):
+                        # NumPy reference path for this plan
+                        y_seg = asset.segment(sr, start_sec, end_sec)
+                        return self._render(y_seg, sr, start_sec, end_sec, src_bpm, plan, out_audio)
+                if self.two_pass:
+                    if plan.start_sec is None or plan.end_sec is None:
+                        start_sec, end_sec = self.best_window(env, env_rate, total_sec, dur)
+                    else:
+                        start_sec, end_sec = plan.start_sec, plan.end_sec
+                    # pass 2: decode only the chosen range at full quality
+                    y_seg = asset.segment(sr, start_sec, end_sec)
+                else:
+                    y, rms = shared[sr]
+                    if plan.start_sec is None or plan.end_sec is None:
+                        start_sec, end_sec = self.pick_best_segment(y, sr, dur, rms=rms)
+                    else:
+                        start_sec, end_sec = plan.start_sec, plan.end_sec
+                    y_seg = self.crop(y, sr, start_sec, end_sec)
+                return self._render(y_seg, sr, start_sec, end_sec, src_bpm, plan, out_audio)
+
+            n_workers = max(1, min(len(pending), workers or REMIX_WORKERS))
+            items = list(pending.values())
+            with ThreadPoolExecutor(max_workers=n_workers) as pool:
+                for item, dbg in zip(items, pool.map(run, items)):
+                    for i in item[3]:
+                        results[i] = (dbg["out_audio"], dict(dbg))
+        return results
+
+    def stream_many(
+        self,
+        audio: str | AudioAsset,
+        jobs: list[tuple[RemixPlan, float]],
+        cache_dir: str | Path | None = None,
+    ) -> list[RemixStream]:
+        """
+        Like apply_many, but for feeding a mux directly: cached renders come
+        back as file inputs, everything else as a deferred render that streams
+        raw PCM into the consumer instead of being read back from a WAV.
+        Windows are picked up front from the low-rate envelope, as apply_many
+        does in two-pass / ffmpeg mode; in those modes the stream is also teed
+        into the render cache, so a rerun finds every platform cached.
+        """
+        asset = audio if isinstance(audio, AudioAsset) else AudioAsset(audio)
+        out_dir = Path(cache_dir) if cache_dir is not None else REMIX_CACHE_DIR
+        digest = file_digest(asset.path)
+
+        streams = []
+        env = None
+        for plan, dur in jobs:
+            out_audio = out_dir / f"remix_{self._cache_key(digest, plan, dur)[:20]}.wav"
+            dbg = self._cached(out_audio)
+            if dbg is not None:
+                streams.append(RemixStream(plan.out_sr, dbg, path=str(out_audio)))
+                continue
+            if env is None:
+                env, env_rate, total_sec = asset.envelope()
+                src_bpm = self.source_bpm(asset)
+            if plan.start_sec is not None and plan.end_sec is not None:
+                start_sec, end_sec = plan.start_sec, plan.end_sec
+            else:
+                start_sec, end_sec = self.best_window(env, env_rate, total_sec, dur)
+
+            # same windows as apply_many would pick, so the render can fill its cache entry
+            cacheable = self.two_pass or self.backend == "ffmpeg"
+
+            def render(sink, plan=plan, start_sec=start_sec, end_sec=end_sec, src_bpm=src_bpm,
+                       out_audio=out_audio, cacheable=cacheable):
+                tee = _CacheTee(sink, out_audio, plan.out_sr) if cacheable else None
+                target = tee if tee is not None else sink
+                try:
+                    dbg = None
+                    if self.backend == "ffmpeg":
+                        try:
+                            dbg = self._render_ffmpeg(asset.path, start_sec, end_sec, src_bpm, plan, target)
+                        except (FileNotFoundError, PermissionError):
+                            # ffmpeg couldn't be spawned, nothing reached the sink: NumPy path.
+                            # Write errors (e.g. BrokenPipeError once the mux stops reading) propagate.
+                            pass
+                    if dbg is None:
+                        y_seg = asset.segment(plan.out_sr, start_sec, end_sec)
+                        dbg = self._render(y_seg, plan.out_sr, start_sec, end_sec, src_bpm, plan, target)
+                except BaseException:
+                    if tee is not None:
+                        tee.abort()
+                    raise
+                return tee.commit(self, dbg) if tee is not None else dbg
+
+            dbg = {
+                "src_bpm": src_bpm,
+                "segment": {"start_sec": start_sec, "end_sec": end_sec},
+                "target_bpm": plan.target_bpm,
+                "out_sr": plan.out_sr,
+                "out_audio": None,
+            }
+            streams.append(RemixStream(plan.out_sr, dbg, render=render))
+        return streams
+
+    def apply(self, audio: str | AudioAsset, plan: RemixPlan, target_duration_sec: float) -> tuple[str, dict]:
+        """
+        `audio` is a path or an AudioAsset (decoded once, tempo computed once).
+        Returns (out_audio_path, debug_info); see apply_many for caching.
+        """
+        return self.apply_many(audio, [(plan, target_duration_sec)])[0]
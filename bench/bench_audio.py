@@ -0,0 +1,103 @@
+"""
+Audio loading benchmarks.
+
+    python -m bench.bench_audio decode [--audio a.mp3 ...] [--seconds 180] [--sr 22050]
+"""
+import argparse
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from ml.audio_io import ffmpeg_available, load_pcm
+
+
+def make_song(path: str, seconds: float = 180.0, sr: int = 44100, bpm: float = 124.0, seed: int = 0):
+    """Synthetic stereo track: bass tone + noise hits on the beat."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    hits = (np.mod(t, 60.0 / bpm) < 0.04) * rng.normal(0, 0.5, len(t))
+    left = 0.25 * np.sin(2 * np.pi * 110 * t) + hits
+    right = 0.25 * np.sin(2 * np.pi * 165 * t) + hits
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    sf.write(path, np.stack([left, right], axis=1).astype(np.float32), sr)
+
+
+def _songs(args) -> list[str]:
+    if args.audio:
+        return list(args.audio)
+    tmp = Path(tempfile.mkdtemp(prefix="viral_bench_"))
+    wav = tmp / "song.wav"
+    make_song(str(wav), seconds=args.seconds)
+    out = [str(wav)]
+    for ext, codec in (("mp3", "libmp3lame"), ("m4a", "aac")):
+        p = tmp / f"song.{ext}"
+        r = subprocess.run(
+            ["ffmpeg", "-v", "error", "-y", "-i", str(wav), "-c:a", codec, "-b:a", "192k", str(p)],
+            capture_output=True,
+        )
+        if r.returncode == 0:
+            out.append(str(p))
+        else:
+            print(f"[skip] cannot encode {ext} ({codec} missing?)")
+    return out
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    res = fn()
+    return res, time.perf_counter() - t0
+
+
+def _compare(a: np.ndarray, b: np.ndarray) -> str:
+    n = min(len(a), len(b))
+    if n == 0:
+        return "empty"
+    corr = float(np.corrcoef(a[:n], b[:n])[0, 1])
+    return f"len {len(a)}/{len(b)}  corr {corr:.4f}"
+
+
+def cmd_decode(args) -> int:
+    """librosa.load vs ffmpeg f32le pipe: full file and an offset/duration window."""
+    if not ffmpeg_available():
+        print("ffmpeg not found on PATH")
+        return 1
+    for p in _songs(args):
+        # warm-up (imports, codec init, page cache)
+        load_pcm(p, args.sr, duration=1.0, decoder="librosa")
+        load_pcm(p, args.sr, duration=1.0, decoder="ffmpeg")
+
+        (y_lr, _), t_lr = _timed(lambda: load_pcm(p, args.sr, decoder="librosa"))
+        (y_ff, _), t_ff = _timed(lambda: load_pcm(p, args.sr, decoder="ffmpeg"))
+        print(f"{Path(p).name} full @ {args.sr} Hz: librosa {t_lr:.2f}s  ffmpeg {t_ff:.2f}s  "
+              f"x{t_lr / max(t_ff, 1e-9):.1f}  {_compare(y_lr, y_ff)}")
+
+        off, dur = args.offset, args.duration
+        (w_lr, _), t_lr = _timed(lambda: load_pcm(p, args.sr, off, dur, decoder="librosa"))
+        (w_ff, _), t_ff = _timed(lambda: load_pcm(p, args.sr, off, dur, decoder="ffmpeg"))
+        print(f"{Path(p).name} [{off:g}s +{dur:g}s]: librosa {t_lr:.2f}s  ffmpeg {t_ff:.2f}s  "
+              f"x{t_lr / max(t_ff, 1e-9):.1f}  {_compare(w_lr, w_ff)}")
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    d = sub.add_parser("decode", help="librosa vs ffmpeg PCM decode on WAV/MP3/M4A")
+    d.add_argument("--audio", nargs="*", help="files to test (default: generated WAV + MP3 + M4A)")
+    d.add_argument("--seconds", type=float, default=180.0)
+    d.add_argument("--sr", type=int, default=22050)
+    d.add_argument("--offset", type=float, default=60.0)
+    d.add_argument("--duration", type=float, default=20.0)
+    d.set_defaults(fn=cmd_decode)
+
+    args = ap.parse_args()
+    raise SystemExit(args.fn(args))
+
+
+if __name__ == "__main__":
+    main()
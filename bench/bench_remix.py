@@ -0,0 +1,111 @@
+"""
+Remix backend benchmarks.
+
+    python -m bench.bench_remix backends [--audio song.mp3] [--seconds 180] [--drum-loop loop.wav]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from audio_remix.presets import (
+    preset_cinematic_epic,
+    preset_jedag_jedug,
+    preset_lofi_chill,
+    preset_mellow_rainy,
+    preset_tiktok_house,
+)
+from audio_remix.remix_engine import AudioRemixEngine
+from bench.bench_audio import make_song
+from ml.audio_asset import AudioAsset
+
+
+def make_loop(path: str, sr: int = 44100, bpm: float = 128.0, bars: int = 1):
+    """One bar of kick/hat clicks."""
+    beat = int(sr * 60.0 / bpm)
+    y = np.zeros(beat * 4 * bars, dtype=np.float32)
+    t = np.arange(int(0.08 * sr)) / sr
+    kick = (np.sin(2 * np.pi * 60 * t) * np.exp(-t * 40)).astype(np.float32)
+    for k in range(4 * bars):
+        y[k * beat:k * beat + len(kick)] += kick
+    sf.write(path, y, sr)
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    res = fn()
+    return res, time.perf_counter() - t0
+
+
+def _levels(path: str) -> tuple[float, float, float]:
+    """(rms dBFS, peak dBFS, seconds)"""
+    y, sr = sf.read(path, dtype="float32")
+    rms = float(np.sqrt(np.mean(y ** 2))) if len(y) else 0.0
+    peak = float(np.max(np.abs(y))) if len(y) else 0.0
+    db = lambda v: 20 * np.log10(max(v, 1e-9))
+    return db(rms), db(peak), len(y) / float(sr)
+
+
+def cmd_backends(args) -> int:
+    """NumPy reference vs ffmpeg filter graph: runtime and loudness/peak parity per preset."""
+    tmp = Path(tempfile.mkdtemp(prefix="viral_bench_"))
+    audio = args.audio
+    if not audio:
+        audio = str(tmp / "song.wav")
+        make_song(audio, seconds=args.seconds)
+    loop = args.drum_loop
+    if not loop:
+        loop = str(tmp / "loop.wav")
+        make_loop(loop)
+
+    asset = AudioAsset(audio)
+    src_bpm = asset.tempo if asset.tempo > 0 else 120.0
+    presets = {
+        "jedag_jedug": preset_jedag_jedug(src_bpm, loop),
+        "tiktok_house": preset_tiktok_house(src_bpm, loop),
+        "mellow_rainy": preset_mellow_rainy(),
+        "cinematic_epic": preset_cinematic_epic(),
+        "lofi_chill": preset_lofi_chill(),
+    }
+    engines = {name: AudioRemixEngine(backend=name) for name in ("numpy", "ffmpeg")}
+    if engines["ffmpeg"].backend != "ffmpeg":
+        print("ffmpeg not found on PATH")
+        return 1
+    asset.envelope()  # shared pass 1, not part of either backend's time
+
+    print(f"{'preset':15s} {'backend':7s} {'time':>7s} {'rms dB':>8s} {'peak dB':>8s} {'len s':>7s}")
+    worst = 0.0
+    for name, plan in presets.items():
+        levels = {}
+        for backend, engine in engines.items():
+            (out, _), dt = _timed(lambda: engine.apply_many(
+                asset, [(plan, args.duration)], workers=1, cache_dir=tmp / f"{backend}_{time.time_ns()}"
+            )[0])
+            levels[backend] = _levels(out)
+            rms_db, peak_db, secs = levels[backend]
+            print(f"{name:15s} {backend:7s} {dt:6.2f}s {rms_db:8.2f} {peak_db:8.2f} {secs:7.2f}")
+        worst = max(worst, abs(levels["numpy"][0] - levels["ffmpeg"][0]))
+    print(f"max rms difference: {worst:.2f} dB")
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("backends", help="numpy vs ffmpeg remix backend per preset")
+    b.add_argument("--audio", help="song to remix (default: generated 180 s track)")
+    b.add_argument("--seconds", type=float, default=180.0)
+    b.add_argument("--duration", type=float, default=30.0, help="target duration per render (s)")
+    b.add_argument("--drum-loop", help="drum loop (default: generated 1-bar loop)")
+    b.set_defaults(fn=cmd_backends)
+
+    args = ap.parse_args()
+    raise SystemExit(args.fn(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Pipeline startup benchmarks (each measurement in a fresh interpreter).
+
+    python -m bench.bench_startup import [--repeat 3]
+    python -m bench.bench_startup warmup [--llm-sec 3.0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# fresh process, in-process models only, no embedding cache hits
+_ENV = {**os.environ, "SCORING_SERVICE": "0", "FEATURE_CACHE": "0"}
+
+
+def _run(code: str) -> tuple[float, str]:
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=_ENV)
+    wall = time.perf_counter() - t0
+    if p.returncode != 0:
+        raise RuntimeError(p.stderr.strip()[-400:])
+    return wall, p.stdout.strip()
+
+
+def _best(code: str, repeat: int) -> float:
+    return min(_run(code)[0] for _ in range(max(1, repeat)))
+
+
+def cmd_import(args) -> int:
+    """What a --skip-video-gen / --simulate-video run pays for rescore_select, vs an eager model load."""
+    base = _best("import numpy", args.repeat)
+    lazy = _best("import pipeline.rescore_select", args.repeat)
+    eager = _best("import pipeline.rescore_select as r; r._embedder()", args.repeat)
+    _, loaded = _run("import pipeline.rescore_select as r; print(r._embedder() is not None)")
+    print(f"python + numpy          {base:6.2f}s")
+    print(f"import (lazy)           {lazy:6.2f}s")
+    print(f"import + model load     {eager:6.2f}s   (model available: {loaded})")
+    print(f"saved per non-scoring run: {eager - lazy:.2f}s")
+    return 0
+
+
+_WARMUP = """
+import time
+import pipeline.rescore_select as r
+warm = {warm}
+if warm:
+    r.warm_up_embedder()
+time.sleep({llm_sec})  # stand-in for the LLM calls
+t0 = time.perf_counter()
+r._relevance("upbeat night city drive", ["neon streets at night", "rice field at dawn"])
+print(f"{{time.perf_counter() - t0:.3f}}")
+"""
+
+
+def cmd_warmup(args) -> int:
+    """Latency of the first relevance score after the LLM phase, with and without warm-up."""
+    _, cold = _run(_WARMUP.format(warm=False, llm_sec=args.llm_sec))
+    _, warm = _run(_WARMUP.format(warm=True, llm_sec=args.llm_sec))
+    print(f"first select_best relevance after a {args.llm_sec:g}s LLM phase:")
+    print(f"  lazy load on first use  {float(cold):6.2f}s")
+    print(f"  background warm-up      {float(warm):6.2f}s")
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    i = sub.add_parser("import", help="rescore_select import time vs import + embedding model load")
+    i.add_argument("--repeat", type=int, default=3)
+    i.set_defaults(fn=cmd_import)
+
+    w = sub.add_parser("warmup", help="first relevance call with / without background warm-up")
+    w.add_argument("--llm-sec", type=float, default=3.0)
+    w.set_defaults(fn=cmd_warmup)
+
+    args = ap.parse_args()
+    raise SystemExit(args.fn(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Video analysis benchmarks.
+
+    python -m bench.bench_video resolution [--video a.mp4 ...] [--short-side 360]
+    python -m bench.bench_video prefetch [--video a.mp4 ...] [--depth 4]
+    python -m bench.bench_video backend [--video a.mp4 ...]
+    python -m bench.bench_video adaptive [--seconds 30] [--cut-every 1.3]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from bench.clips import make_clip
+from ml.video_engine import DEFAULT_ANALYSIS_SHORT_SIDE, analyze_video
+
+
+def _clips(args, size=(1920, 1080)) -> list[str]:
+    if args.video:
+        return list(args.video)
+    tmp = Path(tempfile.mkdtemp(prefix="viral_bench_"))
+    out = []
+    for kind in ("talking", "fastcut"):
+        p = tmp / f"{kind}_{size[1]}p.mp4"
+        make_clip(str(p), kind=kind, seconds=args.seconds, size=size)
+        out.append(str(p))
+    return out
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    res = fn()
+    return res, time.perf_counter() - t0
+
+
+def cmd_resolution(args) -> int:
+    """Full-res vs reduced-res analysis: speed and output stability."""
+    unstable = 0
+    for p in _clips(args):
+        full, t_full = _timed(lambda: analyze_video(p))
+        small, t_small = _timed(lambda: analyze_video(p, analysis_short_side=args.short_side))
+        if full is None or small is None:
+            print(f"{p}: cannot open")
+            continue
+        ff, fs = full.features(), small.features()
+        same_flags = ff["has_faces"] == fs["has_faces"] and ff["has_text_overlay"] == fs["has_text_overlay"]
+        cut_ok = abs(ff["cut_rate_per_min"] - fs["cut_rate_per_min"]) <= max(1.0, 0.1 * ff["cut_rate_per_min"])
+        ok = same_flags and cut_ok
+        unstable += 0 if ok else 1
+        print(f"{Path(p).name}: full {t_full:.2f}s  short_side={args.short_side} {t_small:.2f}s  "
+              f"speedup x{t_full / max(t_small, 1e-9):.1f}  {'STABLE' if ok else 'UNSTABLE'}")
+        for k in ff:
+            print(f"    {k:18s} {ff[k]:10.3f} {fs[k]:10.3f}")
+    return 1 if unstable else 0
+
+
+def cmd_prefetch(args) -> int:
+    """Decode throughput with and without the background prefetch thread."""
+    for p in _clips(args):
+        for short_side in (None, DEFAULT_ANALYSIS_SHORT_SIDE):
+            base, t_off = _timed(lambda: analyze_video(p, analysis_short_side=short_side, prefetch=0))
+            pf, t_on = _timed(lambda: analyze_video(p, analysis_short_side=short_side, prefetch=args.depth))
+            if base is None or pf is None:
+                print(f"{p}: cannot open")
+                break
+            same = base.features() == pf.features()
+            print(f"{Path(p).name} short_side={short_side}: {base.sampled} samples  "
+                  f"inline {base.sampled / t_off:.1f} f/s  prefetch={args.depth} {pf.sampled / t_on:.1f} f/s  "
+                  f"x{t_off / max(t_on, 1e-9):.2f}  {'same output' if same else 'OUTPUT DIFFERS'}")
+    return 0
+
+
+def cmd_backend(args) -> int:
+    """OpenCV VideoCapture vs ffmpeg rawvideo pipe, at full and reduced resolution."""
+    for p in _clips(args):
+        for short_side in (None, DEFAULT_ANALYSIS_SHORT_SIDE):
+            cv, t_cv = _timed(lambda: analyze_video(p, analysis_short_side=short_side, backend="opencv"))
+            ff, t_ff = _timed(lambda: analyze_video(p, analysis_short_side=short_side, backend="ffmpeg"))
+            if cv is None or ff is None:
+                print(f"{p}: cannot open")
+                break
+            print(f"{Path(p).name} short_side={short_side}: opencv {t_cv:.2f}s  ffmpeg {t_ff:.2f}s  "
+                  f"x{t_cv / max(t_ff, 1e-9):.2f}")
+            fc, ff = cv.features(), ff.features()
+            for k in fc:
+                print(f"    {k:18s} {fc[k]:10.3f} {ff[k]:10.3f}")
+    return 0
+
+
+def cmd_adaptive(args) -> int:
+    """Fixed stride vs adaptive sampling: analysed frames and cut-rate accuracy."""
+    tmp = Path(tempfile.mkdtemp(prefix="viral_bench_"))
+    for kind in ("talking", "fastcut"):
+        p = tmp / f"{kind}.mp4"
+        truth = make_clip(str(p), kind=kind, seconds=args.seconds, size=(640, 360), cut_every_sec=args.cut_every)
+        true_rate = truth["cuts"] / max(truth["duration_sec"] / 60.0, 1e-6)
+        print(f"{kind}: ground truth {truth['cuts']} cuts = {true_rate:.1f}/min")
+        for sampling in ("stride", "adaptive"):
+            res, dt = _timed(lambda: analyze_video(str(p), sampling=sampling, prefetch=0))
+            if res is None:
+                print(f"{p}: cannot open")
+                return 1
+            rate = res.features()["cut_rate_per_min"]
+            print(f"    {sampling:8s} analysed {res.sampled:5d} frames  {dt:6.2f}s  "
+                  f"cut_rate {rate:6.1f}/min  error {rate - true_rate:+6.1f}")
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("resolution", help="compare full-res vs reduced-res analysis")
+    r.add_argument("--video", nargs="*", help="videos to test (default: generated 1080p clips)")
+    r.add_argument("--seconds", type=float, default=20.0)
+    r.add_argument("--short-side", type=int, default=DEFAULT_ANALYSIS_SHORT_SIDE)
+    r.set_defaults(fn=cmd_resolution)
+
+    q = sub.add_parser("prefetch", help="throughput with/without background decode")
+    q.add_argument("--video", nargs="*", help="videos to test (default: generated 1080p clips)")
+    q.add_argument("--seconds", type=float, default=20.0)
+    q.add_argument("--depth", type=int, default=4)
+    q.set_defaults(fn=cmd_prefetch)
+
+    k = sub.add_parser("backend", help="opencv vs ffmpeg frame source")
+    k.add_argument("--video", nargs="*", help="videos to test (default: generated 1080p clips)")
+    k.add_argument("--seconds", type=float, default=20.0)
+    k.set_defaults(fn=cmd_backend)
+
+    a = sub.add_parser("adaptive", help="fixed stride vs adaptive sampling on synthetic clips")
+    a.add_argument("--seconds", type=float, default=30.0)
+    a.add_argument("--cut-every", type=float, default=1.3, help="cut interval of the fastcut clip (s)")
+    a.set_defaults(fn=cmd_adaptive)
+
+    args = ap.parse_args()
+    raise SystemExit(args.fn(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Synthetic test clips for the bench scripts (no real footage needed).
+
+- talking: mostly static shot, slow movement, caption band at the bottom
+- fastcut: jedag-jedug style edit, hard cut every `cut_every_sec`
+"""
+from pathlib import Path
+import cv2
+import numpy as np
+
+
+def _scene(rng: np.random.Generator, w: int, h: int) -> np.ndarray:
+    base = rng.integers(0, 256, size=3)
+    img = np.empty((h, w, 3), dtype=np.uint8)
+    img[:] = base
+    for _ in range(6):
+        c = tuple(int(v) for v in rng.integers(0, 256, size=3))
+        p0 = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+        p1 = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+        cv2.rectangle(img, p0, p1, c, -1)
+    return img
+
+
+def make_clip(
+    path: str,
+    kind: str = "talking",
+    seconds: float = 20.0,
+    fps: float = 30.0,
+    size: tuple[int, int] = (1280, 720),
+    cut_every_sec: float = 0.5,
+    seed: int = 0,
+) -> dict:
+    """Write a clip and return its ground truth ({"cuts": n, "duration_sec": s})."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    vw = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    n = int(seconds * fps)
+    scene = _scene(rng, w, h)
+    cuts = 0
+    cut_every = max(1, int(cut_every_sec * fps))
+    for i in range(n):
+        if kind == "fastcut" and i > 0 and i % cut_every == 0:
+            scene = _scene(rng, w, h)
+            cuts += 1
+        frame = scene.copy()
+        # slow subject movement
+        cx = int(w / 2 + (w / 8) * np.sin(i / (fps * 2.0)))
+        cv2.ellipse(frame, (cx, h // 2), (w // 10, h // 5), 0, 0, 360, (40, 80, 200), -1)
+        # subtitle band (two lines, kinetic-caption style)
+        line = i // int(fps * 2)
+        for k, y in enumerate((0.74, 0.84, 0.94)):
+            cv2.putText(
+                frame, f"LIRIK BARIS {line + k} LA LA LA NA NA", (w // 40, int(h * y)),
+                cv2.FONT_HERSHEY_SIMPLEX, h / 240.0, (255, 255, 255), max(1, h // 180), cv2.LINE_AA,
+            )
+        vw.write(frame)
+    vw.release()
+    return {"cuts": cuts, "duration_sec": n / fps}
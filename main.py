@@ -6,21 +6,24 @@ import os
 import re
 import math
 
+from ml.audio_asset import AudioAsset
 from ml.feature_audio import extract_audio_features
 from ml.feature_text import extract_text_features
 from ml.feature_video import extract_video_features
-from ml.scorer import ViralityScorer
+from ml.video_engine import VideoTimeline
+from ml.video_index import load_or_build_timeline
+from ml.scoring_service import get_scorer
 
 from llm.gpt52_client import GPT52Client
 from pipeline.build_brief import build_creative_brief
 from pipeline.generate_creative import generate_creative
 
-from ml.character_crop import extract_person_refs
+from ml.character_crop import PersonRefCollector
 from video_gen.kie_client import KieVeoClient, KieConfig
 
 from pipeline.generate_video import generate_videos_kie
-from pipeline.rescore_select import select_best
-from audio_remix.remix_engine import AudioRemixEngine
+from pipeline.rescore_select import select_best, warm_up_embedder
+from audio_remix.remix_engine import REMIX_STREAM, AudioRemixEngine, RemixStream
 from audio_remix.presets import (
     preset_jedag_jedug,
     preset_tiktok_house,
@@ -29,8 +32,8 @@ from audio_remix.presets import (
     preset_lofi_chill,
 )
 import subprocess
+import tempfile
 from pipeline.generate_video import generate_videos_kie_simulate
-import cv2
 
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "outputs"))
 
@@ -80,6 +83,10 @@ def parse_args():
         default=None,
         help="Optional source video/footage path (if provided, OpenCV features will be extracted)"
     )
+    p.add_argument("--video-max-frames", type=int, default=None,
+               help="Analyse at most N frames of --video (sparse seek sampling; default: every 5th frame)")
+    p.add_argument("--video-workers", type=int, default=1,
+               help="Analyse --video in N parallel time shards (ignored with --use-character-ref)")
     p.add_argument("--skip-video-gen", action="store_true",
                help="Skip video generation; only produce captions/hashtags")
 
@@ -203,75 +210,79 @@ def _probe_video_params(path: str) -> tuple[int, int, float] | None:
     except Exception:
         return None
 
-def _pick_best_segment_start(video_path: str, target_dur: float, sample_every_n_frames: int = 5) -> float:
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return 0.0
-
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
-    duration_sec = frame_count / fps if fps > 0 else 0.0
-    if duration_sec <= target_dur or target_dur <= 0:
-        cap.release()
+def _audio_inputs(audio: str | RemixStream) -> list[str]:
+    # ffmpeg input args for a mux audio track: a file, or a remix streamed on stdin
+    if isinstance(audio, RemixStream):
+        return audio.ffmpeg_input()
+    return ["-i", audio]
+
+def _run_ffmpeg(cmd: list[str], audio: str | RemixStream | None = None) -> subprocess.CompletedProcess:
+    """
+    Run ffmpeg; a RemixStream without a cached file is rendered straight into
+    its stdin while it runs, so the remixed audio never touches the disk.
+    """
+    print("[FFMPEG]", " ".join(cmd))
+    if not isinstance(audio, RemixStream) or audio.path:
+        return subprocess.run(cmd, capture_output=True, text=True)
+    with tempfile.TemporaryFile() as err:
+        # stderr to a file: a full pipe would block ffmpeg while we're writing its stdin
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=err)
+        try:
+            audio.dbg = audio.render(proc.stdin)
+        except BrokenPipeError:
+            pass  # -shortest: ffmpeg stopped reading once the video ended
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        proc.wait()
+        err.seek(0)
+        return subprocess.CompletedProcess(cmd, proc.returncode, "", err.read().decode("utf-8", "replace"))
+
+def _pick_best_segment_start(
+    video_path: str,
+    target_dur: float,
+    sample_every_n_frames: int = 5,
+    timeline: VideoTimeline | None = None,
+) -> float:
+    if timeline is None:
+        timeline = load_or_build_timeline(video_path, sample_every_n_frames=sample_every_n_frames)
+    if timeline is None:
         return 0.0
-
-    face_cascade = cv2.CascadeClassifier(
-        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-    )
-
-    sec_bins = int(duration_sec) + 2
-    motion = [0.0] * sec_bins
-    faces = [0] * sec_bins
-    prev_gray = None
-    idx = 0
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        idx += 1
-        if idx % sample_every_n_frames != 0:
-            continue
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
-        sec = int(t)
-        if prev_gray is not None:
-            diff = cv2.absdiff(gray, prev_gray)
-            motion[sec] += float(cv2.mean(diff)[0])
-        prev_gray = gray
-        fs = face_cascade.detectMultiScale(gray, 1.1, 4)
-        if len(fs) > 0:
-            faces[sec] += 1
-
-    cap.release()
-
-    window = max(1, int(target_dur))
-    best_start = 0
-    best_score = -1.0
-    for s in range(0, max(1, sec_bins - window)):
-        mot = sum(motion[s:s + window])
-        fac = sum(faces[s:s + window])
-        score = mot + (fac * 50.0)
-        if score > best_score:
-            best_score = score
-            best_start = s
-    return float(best_start)
-
-def _trim_video_best(video_path: str, target_dur: float, out_path: str) -> str:
-    start = _pick_best_segment_start(video_path, target_dur)
+    return timeline.best_segment_start(target_dur)
+
+def _trim_video_best(
+    video_path: str,
+    target_dur: float,
+    out_path: str,
+    timeline: VideoTimeline | None = None,
+    start: float | None = None,
+    audio: str | RemixStream | None = None,
+) -> str:
+    # with `audio`, the trimmed video gets that track instead of its own (trim + mux in one pass)
+    if start is None:
+        start = _pick_best_segment_start(video_path, target_dur, timeline=timeline)
     cmd = [
         "ffmpeg", "-y",
         "-ss", f"{start:.2f}",
         "-t", f"{target_dur:.2f}",
         "-i", video_path,
+    ]
+    if audio is not None:
+        cmd += _audio_inputs(audio) + ["-map", "0:v:0", "-map", "1:a:0", "-shortest"]
+    cmd += [
         "-c:v", "libx264",
         "-c:a", "aac",
         "-b:a", "192k",
         "-movflags", "+faststart",
         out_path,
     ]
-    print("[FFMPEG]", " ".join(cmd))
-    p = subprocess.run(cmd, capture_output=True, text=True)
+    p = _run_ffmpeg(cmd, audio)
     if p.returncode != 0:
         raise RuntimeError(
             "ffmpeg trim failed\n"
@@ -290,7 +301,13 @@ def _trim_video_best(video_path: str, target_dur: float, out_path: str) -> str:
     except Exception:
         return None
 
-def _concat_videos_fadeblack(video_paths: list[str], out_path: str, transition_sec: float) -> str:
+def _concat_videos_fadeblack(
+    video_paths: list[str],
+    out_path: str,
+    transition_sec: float,
+    audio: str | RemixStream | None = None,
+) -> str:
+    # with `audio`, that track is muxed in by the same ffmpeg run (otherwise the output is silent)
     if len(video_paths) < 2:
         return video_paths[0] if video_paths else ""
 
@@ -331,10 +348,17 @@ def _concat_videos_fadeblack(video_paths: list[str], out_path: str, transition_s
     cmd = ["ffmpeg", "-y"]
     for p in video_paths:
         cmd.extend(["-i", p])
+    if audio is not None:
+        cmd.extend(_audio_inputs(audio))
     cmd.extend([
         "-filter_complex", filter_complex,
         "-map", f"[{last}]",
-        "-an",
+    ])
+    if audio is None:
+        cmd.append("-an")
+    else:
+        cmd.extend(["-map", f"{len(video_paths)}:a:0", "-c:a", "aac", "-b:a", "192k", "-shortest"])
+    cmd.extend([
         "-c:v", "libx264",
         "-preset", "veryfast",
         "-crf", "20",
@@ -342,8 +366,7 @@ def _concat_videos_fadeblack(video_paths: list[str], out_path: str, transition_s
         out_path,
     ])
 
-    print("[FFMPEG]", " ".join(cmd))
-    p = subprocess.run(cmd, capture_output=True, text=True)
+    p = _run_ffmpeg(cmd, audio)
     if p.returncode != 0:
         raise RuntimeError(
             "ffmpeg concat failed\n"
@@ -553,8 +576,30 @@ def _concat_segment_groups(videos: list[dict], out_dir: Path, transition_sec: fl
         })
     return concat_videos
 
-def merge_video_audio(video_obj, audio_path: str) -> str:
+def _auto_audio_style(platform: str, mood: str) -> str:
+    # AUTO STYLE kalau user tidak memilih
+    if platform in ("tiktok", "instagram", "youtube_short"):
+        return "jedag_jedug" if mood in ("hype", "happy") else "mellow_rainy"
+    return "cinematic_epic"
+
+
+def _remix_plan(style: str, src_bpm: float, drum_loop: str | None):
+    if style == "jedag_jedug":
+        return preset_jedag_jedug(src_bpm, drum_loop)
+    if style == "tiktok_house":
+        return preset_tiktok_house(src_bpm, drum_loop)
+    if style == "mellow_rainy":
+        return preset_mellow_rainy()
+    if style == "cinematic_epic":
+        return preset_cinematic_epic()
+    if style == "lofi_chill":
+        return preset_lofi_chill()
+    return preset_mellow_rainy()
+
+
+def merge_video_audio(video_obj, audio: str | RemixStream, out_path: str | None = None) -> str:
     # video_obj bisa dict atau str (hasil select_best)
+    # audio: path, atau RemixStream (di-render langsung ke stdin ffmpeg, tanpa WAV)
     if video_obj is None:
         raise FileNotFoundError("Video input for merge not found: None")
 
@@ -562,17 +607,18 @@ def merge_video_audio(video_obj, audio_path: str) -> str:
     if not video_path or not os.path.exists(video_path):
         raise FileNotFoundError(f"Video input for merge not found: {video_path}")
 
-    if not os.path.exists(audio_path):
+    audio_path = audio.path if isinstance(audio, RemixStream) else audio
+    if audio_path is not None and not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio input for merge not found: {audio_path}")
 
-    out = str(Path(video_path).with_name(Path(video_path).stem + "_final.mp4"))
+    out = out_path or str(Path(video_path).with_name(Path(video_path).stem + "_final.mp4"))
     Path(out).parent.mkdir(parents=True, exist_ok=True)
 
     # IMPORTANT: pakai ffmpeg yang ada di PATH
     cmd = [
         "ffmpeg", "-y",
         "-i", video_path,
-        "-i", audio_path,
+        *_audio_inputs(audio),
         "-map", "0:v:0",     # video dari Kie
         "-map", "1:a:0",     # audio dari lagu kamu
         "-c:v", "copy",
@@ -583,8 +629,7 @@ def merge_video_audio(video_obj, audio_path: str) -> str:
         out
     ]
 
-    print("[FFMPEG]", " ".join(cmd))
-    p = subprocess.run(cmd, capture_output=True, text=True)
+    p = _run_ffmpeg(cmd, audio)
 
     if p.returncode != 0:
         raise RuntimeError(
@@ -635,14 +680,20 @@ def main():
         raise ValueError("No valid platforms selected.")
 
     # ====== Feature Extraction ======
+    # decoded once; shared by feature extraction and every platform's remix
+    audio_asset = None
     if args.content_type == "music" and audio_path:
-        audio_feat = extract_audio_features(str(audio_path))
+        audio_asset = AudioAsset(str(audio_path))
+        audio_feat = extract_audio_features(str(audio_path), asset=audio_asset)
     else:
         audio_feat = {
             "bpm": 120.0,
             "rms": 0.0,
             "duration_sec": 0.0,
             "spectral_centroid": 0.0,
+            "onset_density": 0.0,
+            "spectral_flux": 0.0,
+            "low_band_ratio": 0.0,
         }
 
     # Text features from lyrics + optional caption seed (CTA, sentiment, etc.)
@@ -651,8 +702,31 @@ def main():
     text_feat = extract_text_features(combined_text)
 
     # Video features (optional)
+    # One decode pass feeds features, best-segment trimming and character refs;
+    # reruns on the same footage read the per-second timeline index instead.
+    video_timeline = None
+    ref_collector = None
     if video_path:
-        video_feat = extract_video_features(str(video_path))
+        if args.use_character_ref:
+            ref_collector = PersonRefCollector(
+                max_refs=args.ref_frames,
+                frame_stride=args.ref_frame_stride,
+            )
+        if ref_collector or args.skip_video_gen:
+            video_timeline = load_or_build_timeline(
+                str(video_path),
+                max_frames=args.video_max_frames,
+                workers=max(1, args.video_workers),
+                extra_taps=[ref_collector] if ref_collector else (),
+            )
+            video_feat = extract_video_features(str(video_path), analysis=video_timeline)
+        else:
+            # features only -> content-addressed feature cache (ml.feature_cache)
+            video_feat = extract_video_features(
+                str(video_path),
+                max_frames=args.video_max_frames,
+                workers=max(1, args.video_workers),
+            )
     else:
         # default zeros; scorer will also pad missing columns,
         # but this makes it explicit for debugging
@@ -670,7 +744,8 @@ def main():
     base_features.update(video_feat)
 
     # ====== ML prediction (baseline) ======
-    scorer = ViralityScorer()
+    # warm models from the scoring service if it's running, else loaded in-process
+    scorer = get_scorer()
     ml_pred = scorer.predict(base_features)
 
     # ====== Init LLM + KIE ======
@@ -714,13 +789,9 @@ def main():
         if not video_path:
             raise ValueError("--use-character-ref requires --video")
 
-        print("[REF] Extracting character reference images...")
+        print("[REF] Character reference images (collected during video analysis)...")
 
-        ref_paths = extract_person_refs(
-            str(video_path),
-            max_refs=args.ref_frames,
-            frame_stride=args.ref_frame_stride
-        )
+        ref_paths = ref_collector.refs if ref_collector else []
 
         if not ref_paths:
             raise RuntimeError("No reference images extracted from video.")
@@ -749,8 +820,35 @@ def main():
 
 
 
+    # Best trim start for every platform duration, planned once from the single analysis pass
+    segment_starts = {}
+    if args.skip_video_gen and video_timeline is not None:
+        segment_starts = video_timeline.best_segment_starts(
+            sorted({float(int(prof.get("duration", [15, 20])[1])) for prof in selected.values()})
+        )
+
     remixer = AudioRemixEngine()
 
+    # All platform remixes planned in one batch (shared decode/BPM/energy). With REMIX_STREAM
+    # each one is rendered later straight into its final mux; otherwise as cached WAVs now.
+    remix_outputs = {}
+    if args.remix and audio_asset is not None:
+        src_bpm = audio_feat.get("bpm", 120.0)
+        remix_styles, remix_jobs = [], []
+        for platform, profile in selected.items():
+            style = args.audio_style or _auto_audio_style(platform, mood)
+            remix_styles.append((platform, style))
+            remix_jobs.append((_remix_plan(style, src_bpm, args.drum_loop), int(profile.get("duration", [15, 20])[1])))
+        if REMIX_STREAM:
+            rendered = [(st, st.dbg) for st in remixer.stream_many(audio_asset, remix_jobs)]
+        else:
+            rendered = remixer.apply_many(audio_asset, remix_jobs)
+        remix_outputs = {platform: (style, out) for (platform, style), out in zip(remix_styles, rendered)}
+
+    # Runs that re-score videos need the embedding model: load it while the LLM calls run
+    if not args.skip_video_gen and (args.resume_from_kie or not args.simulate_video):
+        warm_up_embedder()
+
     # ====== Per-platform generation loop ======
     results = {}
 
@@ -899,39 +997,16 @@ def main():
         )
 
         audio_for_platform = str(audio_path) if audio_path else ""
-
-        if args.remix and audio_path and args.content_type == "music":
-            src_bpm = audio_feat.get("bpm", 120.0)
-            style = args.audio_style
-
-            # AUTO STYLE kalau user tidak memilih
-            if style is None:
-                if platform in ("tiktok", "instagram", "youtube_short"):
-                    style = "jedag_jedug" if mood in ("hype", "happy") else "mellow_rainy"
-                else:
-                    style = "cinematic_epic"
-
-            if style == "jedag_jedug":
-                plan = preset_jedag_jedug(src_bpm, args.drum_loop)
-            elif style == "tiktok_house":
-                plan = preset_tiktok_house(src_bpm, args.drum_loop)
-            elif style == "mellow_rainy":
-                plan = preset_mellow_rainy()
-            elif style == "cinematic_epic":
-                plan = preset_cinematic_epic()
-            elif style == "lofi_chill":
-                plan = preset_lofi_chill()
+        remix_audio = None  # remixed track, muxed by whichever ffmpeg step writes the final video
+        muxed_video = None
+
+        if platform in remix_outputs:
+            style, (audio_for_platform, audio_dbg) = remix_outputs[platform]
+            remix_audio = audio_for_platform
+            if isinstance(audio_for_platform, RemixStream):
+                print(f"[AUDIO] style={style} -> {audio_for_platform.path or 'streamed into mux'}")
             else:
-                plan = preset_mellow_rainy()
-
-            target_dur = int(profile.get("duration", [15, 20])[1])
-            audio_for_platform, audio_dbg = remixer.apply(
-                str(audio_path),
-                plan,
-                target_duration_sec=target_dur
-            )
-
-            print(f"[AUDIO] style={style} -> {audio_for_platform}")
+                print(f"[AUDIO] style={style} -> {audio_for_platform}")
 
         # generate_videos_kie tetap import kalau mode normal
         if args.skip_video_gen:
@@ -941,11 +1016,23 @@ def main():
             if video_path:
                 target_dur = int(profile.get("duration", [15, 20])[1])
                 dur = _probe_duration_sec(str(video_path)) or 0.0
+                out_dir = OUTPUT_DIR / "trimmed"
+                out_path = out_dir / f"{platform}_best.mp4"
                 if dur > target_dur:
-                    out_dir = OUTPUT_DIR / "trimmed"
                     out_dir.mkdir(parents=True, exist_ok=True)
-                    out_path = out_dir / f"{platform}_best.mp4"
-                    best_vid = _trim_video_best(str(video_path), float(target_dur), str(out_path))
+                    best_vid = _trim_video_best(
+                        str(video_path),
+                        float(target_dur),
+                        str(out_path),
+                        timeline=video_timeline,
+                        start=segment_starts.get(float(target_dur)),
+                        audio=remix_audio,
+                    )
+                elif remix_audio is not None:
+                    # per-platform output: each platform has its own remix, and the
+                    # upload's directory isn't ours to write to
+                    out_dir.mkdir(parents=True, exist_ok=True)
+                    best_vid = merge_video_audio(best_vid, remix_audio, out_path=str(out_path))
             results[platform] = {
                 "best_video": best_vid,
                 "best_score": None,
@@ -1023,7 +1110,9 @@ def main():
                     ordered.append(p)
             if len(ordered) >= 2:
                 all_out = str(out_dir / f"{platform}_all_concat.mp4")
-                all_path = _concat_videos_fadeblack(ordered, all_out, transition_sec)
+                all_path = _concat_videos_fadeblack(ordered, all_out, transition_sec, audio=remix_audio)
+                if remix_audio is not None:
+                    muxed_video = all_path
                 print(f"[CONCAT] {platform}: merged {len(ordered)} segments -> {all_path}")
                 videos = [{
                     "path": all_path,
@@ -1058,7 +1147,7 @@ def main():
 
         best_video = best_video_path
 
-        if args.remix:
+        if args.remix and best_video != muxed_video:
             best_video = merge_video_audio(best_video, audio_for_platform)
 
         # Pick a caption (you can also re-score captions later)
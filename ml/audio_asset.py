@@ -0,0 +1,200 @@
+"""
+Decoded song shared by feature extraction and the remix engine.
+
+A --remix run used to decode the same file once for features (22.05 kHz) and
+once per platform in AudioRemixEngine.apply (44.1 kHz), each followed by its
+own beat tracker. An AudioAsset decodes once (at DECODE_SR, via ml.audio_io),
+keeps resampled copies per sample rate, and computes tempo/onset data once.
+"""
+from __future__ import annotations
+
+import threading
+import librosa
+import numpy as np
+
+from ml.audio_io import load_pcm, stream_pcm
+from ml.feature_cache import cached_features, file_digest
+from ml.pcm_cache import cached_pcm, lookup_pcm
+
+# rate the song is decoded at once (the remix output rate); other rates are resampled from it
+DECODE_SR = 44100
+
+# low-rate energy envelope for coarse segment selection (~46 ms frames)
+ENVELOPE_SR = 11025
+ENVELOPE_HOP = 512
+ENVELOPE_VERSION = "1"
+
+# rate/window the tempo and onset data are computed at (same as the feature extractor)
+ANALYSIS_SR = 22050
+ANALYSIS_MAX_SEC = 120.0
+ANALYSIS_N_FFT = 2048
+ANALYSIS_HOP = 512
+
+
+def _hop_rms(blocks, hop: int) -> tuple[np.ndarray, int]:
+    """RMS per non-overlapping `hop` samples over a stream of blocks, and the sample count."""
+    parts, carry, total = [], np.empty(0, dtype=np.float32), 0
+    for block in blocks:
+        total += len(block)
+        x = np.concatenate([carry, block]) if len(carry) else block
+        n = len(x) // hop * hop
+        if n:
+            frames = x[:n].reshape(-1, hop)
+            parts.append(np.sqrt(np.einsum("ij,ij->i", frames, frames) / hop))
+        carry = x[n:].copy()
+    if len(carry):
+        parts.append(np.sqrt([float(np.dot(carry, carry)) / len(carry)]))
+    rms = np.concatenate(parts).astype(np.float32) if parts else np.zeros(0, dtype=np.float32)
+    return rms, total
+
+
+def _read_only(y: np.ndarray) -> np.ndarray:
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    y.flags.writeable = False
+    return y
+
+
+class AudioAsset:
+    def __init__(self, audio_path: str):
+        self.path = str(audio_path)
+        self._lock = threading.Lock()
+        self._base = None
+        self._by_sr = {}
+        self._heads = {}
+        self._envelope = None
+        self._spec = None
+        self._tempo = None
+        self._beats = None
+        self._onset_env = None
+
+    def _full(self, sr: int) -> np.ndarray:
+        # whole track at `sr`, via the cross-process PCM cache (caller holds the lock)
+        y = self._by_sr.get(sr)
+        if y is None:
+            compute = None  # decode at DECODE_SR
+            if sr != DECODE_SR:
+                compute = lambda: librosa.resample(self._full(DECODE_SR), orig_sr=DECODE_SR, target_sr=sr)
+            y = _read_only(cached_pcm(self.path, sr, compute=compute))
+            self._by_sr[sr] = y
+            if sr == DECODE_SR:
+                self._base = y
+        return y
+
+    def samples(self, sr: int, duration: float | None = None) -> np.ndarray:
+        """
+        Mono float32 at `sr` (read-only, shared between callers), optionally
+        limited to the first `duration` seconds. A `duration` request before
+        the full track is needed decodes just that head, at `sr` directly.
+        Decodes go through ml.pcm_cache, so other jobs on the same song map
+        the same files instead of decoding again.
+        """
+        sr = int(sr)
+        with self._lock:
+            if duration is not None and self._base is None and sr not in self._by_sr:
+                key = (sr, float(duration))
+                y = self._heads.get(key)
+                if y is None:
+                    y = _read_only(cached_pcm(self.path, sr, duration=float(duration)))
+                    self._heads[key] = y
+                return y
+            y = self._full(sr)
+        if duration is not None:
+            y = y[:int(duration * sr)]
+        return y
+
+    def duration_sec(self) -> float:
+        return len(self.samples(DECODE_SR)) / float(DECODE_SR)
+
+    def envelope(self) -> tuple[np.ndarray, float, float]:
+        """
+        (rms, frames_per_sec, total_sec) of the whole track from a cheap,
+        streamed ENVELOPE_SR decode (memory independent of track length);
+        cached on disk with the other audio features.
+        """
+        if self._envelope is None:
+            def compute() -> dict:
+                if self._base is not None:
+                    blocks = [self.samples(ENVELOPE_SR)]
+                else:
+                    blocks = stream_pcm(self.path, ENVELOPE_SR)
+                rms, n = _hop_rms(blocks, ENVELOPE_HOP)
+                return {"rms": rms.tolist(), "total_sec": n / float(ENVELOPE_SR)}
+
+            env = cached_features(
+                "audio_envelope",
+                ENVELOPE_VERSION,
+                file_digest(self.path),
+                {"sr": ENVELOPE_SR, "hop": ENVELOPE_HOP},
+                compute,
+            )
+            self._envelope = (
+                np.asarray(env["rms"], dtype=np.float32),
+                ENVELOPE_SR / float(ENVELOPE_HOP),
+                float(env["total_sec"]),
+            )
+        return self._envelope
+
+    def segment(self, sr: int, start_sec: float, end_sec: float) -> np.ndarray:
+        """
+        [start_sec, end_sec) at `sr`: a slice of the decoded track if it is
+        already in memory or in the PCM cache, otherwise a seeking decode of
+        just that range.
+        """
+        sr = int(sr)
+        start_sec = max(0.0, float(start_sec))
+        with self._lock:
+            full = self._by_sr.get(sr)
+        if full is None:
+            # another job may already have the whole track cached at this rate
+            full = lookup_pcm(self.path, sr)
+        if full is not None:
+            return full[int(start_sec * sr):int(end_sec * sr)]
+        y, _ = load_pcm(self.path, sr=sr, offset=start_sec, duration=max(0.0, end_sec - start_sec))
+        return y
+
+    def spectrogram(self) -> np.ndarray:
+        """
+        |STFT| of the analysis window (n_fft 2048, hop 512), computed once and
+        shared by onset/tempo tracking and the spectral features.
+        """
+        if self._spec is None:
+            y = self.samples(ANALYSIS_SR, ANALYSIS_MAX_SEC)
+            self._spec = np.abs(librosa.stft(y, n_fft=ANALYSIS_N_FFT, hop_length=ANALYSIS_HOP))
+        return self._spec
+
+    def _analyze_rhythm(self):
+        # same onset envelope as onset_strength(y=...), minus the second STFT
+        mel = librosa.feature.melspectrogram(S=self.spectrogram() ** 2, sr=ANALYSIS_SR)
+        onset_env = librosa.onset.onset_strength(
+            S=librosa.power_to_db(mel), sr=ANALYSIS_SR, hop_length=ANALYSIS_HOP
+        )
+        tempo, beats = librosa.beat.beat_track(onset_envelope=onset_env, sr=ANALYSIS_SR)
+        self._onset_env = onset_env
+        self._beats = beats
+        if self._tempo is None:
+            self._tempo = float(np.atleast_1d(tempo)[0])
+
+    @property
+    def tempo(self) -> float:
+        """Estimated tempo in BPM (0.0 if the tracker found none)."""
+        if self._tempo is None:
+            self._analyze_rhythm()
+        return self._tempo
+
+    @property
+    def beats(self) -> np.ndarray:
+        """Beat frame indices at ANALYSIS_SR (hop ANALYSIS_HOP)."""
+        if self._beats is None:
+            self._analyze_rhythm()
+        return self._beats
+
+    @property
+    def onset_env(self) -> np.ndarray:
+        if self._onset_env is None:
+            self._analyze_rhythm()
+        return self._onset_env
+
+    def seed_tempo(self, bpm: float | None):
+        """Reuse a tempo computed elsewhere (e.g. cached features) instead of tracking again."""
+        if bpm is not None and self._tempo is None:
+            self._tempo = float(bpm)
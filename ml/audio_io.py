@@ -0,0 +1,149 @@
+"""
+Audio decoding straight to float32 PCM.
+
+ffmpeg decodes and resamples (soxr when built in, like librosa's default) in
+native code and only touches the requested [offset, offset + duration) range.
+It writes float32 WAV to a pipe; the data chunk is wrapped with np.frombuffer
+and channels are averaged like librosa.to_mono (ffmpeg's own -ac 1 downmix
+uses a -3 dB pan law, which would shift RMS features).
+
+AUDIO_DECODER=auto (default) keeps formats libsndfile opens itself (WAV, FLAC,
+OGG, MP3 on libsndfile >= 1.1) on librosa's in-process path, which beats
+spawning ffmpeg there, and sends the rest (M4A/AAC, video containers, ...)
+through ffmpeg instead of audioread. "ffmpeg" / "librosa" force one path;
+ffmpeg failures always fall back to librosa.load.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import struct
+import librosa
+import numpy as np
+import soundfile as sf
+
+AUDIO_DECODER = os.getenv("AUDIO_DECODER", "auto")
+
+# resampler filters to try in order (not every ffmpeg build has libsoxr)
+_RESAMPLERS = ["aresample=resampler=soxr", None]
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def _soundfile_readable(path: str) -> bool:
+    try:
+        sf.info(path)
+        return True
+    except Exception:
+        return False
+
+
+def _parse_wav(buf: bytes) -> tuple[int, int, int] | None:
+    """(channels, data offset, data bytes) of a float32 WAV written by ffmpeg to a pipe."""
+    if len(buf) < 12 or buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        return None
+    pos, channels = 12, None
+    while pos + 8 <= len(buf):
+        cid, size = buf[pos:pos + 4], struct.unpack("<I", buf[pos + 4:pos + 8])[0]
+        body = pos + 8
+        if cid == b"fmt ":
+            channels = struct.unpack("<H", buf[body + 2:body + 4])[0]
+        elif cid == b"data":
+            if channels is None:
+                return None
+            # piped output can't patch sizes afterwards; the data runs to the end
+            avail = len(buf) - body
+            n = avail if size == 0 or size > avail else size
+            return channels, body, n - n % (4 * channels)
+        pos = body + size + (size & 1)
+    return None
+
+
+def _ffmpeg_pcm(path: str, sr: int, offset: float, duration: float | None) -> np.ndarray | None:
+    for resampler in list(_RESAMPLERS):
+        cmd = ["ffmpeg", "-v", "error", "-nostdin"]
+        if offset and offset > 0:
+            cmd += ["-ss", f"{offset:.6f}"]
+        if duration is not None:
+            cmd += ["-t", f"{max(0.0, duration):.6f}"]
+        cmd += ["-i", path, "-vn", "-sn"]
+        if resampler:
+            cmd += ["-af", resampler]
+        cmd += ["-ar", str(int(sr)), "-acodec", "pcm_f32le", "-f", "wav", "pipe:1"]
+        try:
+            p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError:
+            return None
+        if p.returncode == 0:
+            break
+        if resampler and resampler in _RESAMPLERS and b"soxr" in p.stderr.lower():
+            _RESAMPLERS.remove(resampler)  # this build has no soxr: skip it from now on
+    else:
+        return None
+    info = _parse_wav(p.stdout)
+    if info is None:
+        return None
+    channels, off, nbytes = info
+    y = np.frombuffer(p.stdout, dtype=np.float32, count=nbytes // 4, offset=off)
+    if channels > 1:
+        y = y.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return y
+
+
+def load_pcm(
+    path: str,
+    sr: int,
+    offset: float = 0.0,
+    duration: float | None = None,
+    decoder: str | None = None,
+) -> tuple[np.ndarray, int]:
+    """
+    Mono float32 samples of `path` at `sr`, limited to `duration` seconds
+    from `offset`. The ffmpeg result is read-only (it wraps the pipe buffer);
+    copy before modifying in place.
+    """
+    decoder = decoder or AUDIO_DECODER
+    if decoder == "auto":
+        decoder = "librosa" if _soundfile_readable(str(path)) else "ffmpeg"
+    if decoder == "ffmpeg" and ffmpeg_available():
+        y = _ffmpeg_pcm(str(path), sr, offset, duration)
+        if y is not None:
+            return y, int(sr)
+    y, sr = librosa.load(str(path), sr=sr, mono=True, offset=offset or 0.0, duration=duration)
+    return np.ascontiguousarray(y, dtype=np.float32), int(sr)
+
+
+def stream_pcm(path: str, sr: int, block_samples: int = 1 << 16):
+    """
+    Yield consecutive mono float32 blocks of `path` at `sr` with bounded memory.
+    The ffmpeg path uses its -ac 1 downmix (stereo comes out ~1.41x louder
+    than librosa.to_mono), so use it for relative measures such as energy
+    envelopes; without ffmpeg it falls back to a single load_pcm block.
+    """
+    if not ffmpeg_available():
+        y, _ = load_pcm(path, sr, decoder="librosa")
+        yield y
+        return
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", str(path), "-vn", "-sn",
+        "-ac", "1", "-ar", str(int(sr)),
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "pipe:1",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    nbytes = 4 * int(block_samples)
+    try:
+        while True:
+            buf = proc.stdout.read(nbytes)
+            if not buf:
+                break
+            yield np.frombuffer(buf, dtype=np.float32, count=len(buf) // 4)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
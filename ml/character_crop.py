@@ -2,54 +2,58 @@ from pathlib import Path
 import os
 import cv2
 
-def extract_person_refs(
-    video_path: str,
-    out_dir: str | None = None,
-    max_refs: int = 6,
-    frame_stride: int = 15,
-    min_face_ratio: float = 0.08,
-    min_face_area_ratio: float = 0.005,
-    use_person_fallback: bool = True,
-    prefer_full_body: bool = True,
-):
-    if out_dir is None:
-        out_dir = str(Path(os.getenv("OUTPUT_DIR", "outputs")) / "ref")
-    out = Path(out_dir)
-    out.mkdir(parents=True, exist_ok=True)
+from ml.video_engine import SampledFrame, decode_pass, load_cascade, next_strided
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return []
 
-    face_cascade = cv2.CascadeClassifier(
-        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-    )
-    eye_cascade = cv2.CascadeClassifier(
-        cv2.data.haarcascades + "haarcascade_eye.xml"
-    )
-    hog = None
-    if use_person_fallback:
-        hog = cv2.HOGDescriptor()
-        hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
-
-    refs = []
-    f = 0
-    saved = 0
-
-    while saved < max_refs:
-        ok, frame = cap.read()
-        if not ok:
-            break
-        f += 1
-        if f % frame_stride != 0:
-            continue
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+class PersonRefCollector:
+    """
+    Decode-pass tap that saves person/face crops every `frame_stride` frames.
+    Can share a pass with FeatureTap (see ml.video_engine.analyze_video).
+    """
+
+    def __init__(
+        self,
+        out_dir: str | None = None,
+        max_refs: int = 6,
+        frame_stride: int = 15,
+        min_face_ratio: float = 0.08,
+        min_face_area_ratio: float = 0.005,
+        use_person_fallback: bool = True,
+        prefer_full_body: bool = True,
+    ):
+        if out_dir is None:
+            out_dir = str(Path(os.getenv("OUTPUT_DIR", "outputs")) / "ref")
+        self.out = Path(out_dir)
+        self.out.mkdir(parents=True, exist_ok=True)
+        self.max_refs = max_refs
+        self.frame_stride = max(1, int(frame_stride))
+        self.min_face_ratio = min_face_ratio
+        self.min_face_area_ratio = min_face_area_ratio
+        self.prefer_full_body = prefer_full_body
+
+        self.eye_cascade = load_cascade("haarcascade_eye.xml")
+        self.hog = None
+        if use_person_fallback:
+            self.hog = cv2.HOGDescriptor()
+            self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+        self.refs = []
+
+    @property
+    def done(self) -> bool:
+        return len(self.refs) >= self.max_refs
+
+    def next_index(self, after: int) -> int:
+        return next_strided(after, self.frame_stride)
+
+    def consume(self, fr: SampledFrame):
+        frame = fr.bgr
+        gray = fr.gray
+        faces = fr.faces
         H, W = frame.shape[:2]
-        min_w = int(W * min_face_ratio)
-        min_h = int(H * min_face_ratio)
-        min_area = int(W * H * min_face_area_ratio)
+        min_w = int(W * self.min_face_ratio)
+        min_h = int(H * self.min_face_ratio)
+        min_area = int(W * H * self.min_face_area_ratio)
 
         # keep only reasonable face sizes to avoid false positives
         valid_faces = []
@@ -67,18 +71,18 @@ def extract_person_refs(
                 face_roi = gray[y:y + h, x:x + w]
                 if face_roi.size == 0:
                     continue
-                eyes = eye_cascade.detectMultiScale(face_roi, 1.1, 4)
+                eyes = self.eye_cascade.detectMultiScale(face_roi, 1.1, 4)
                 if len(eyes) > 0:
                     eye_valid.append((x, y, w, h))
             if not eye_valid:
-                continue
+                return
             # pick largest validated face
             x, y, w, h = max(eye_valid, key=lambda b: b[2] * b[3])
-        elif hog is not None:
+        elif self.hog is not None:
             # fallback: full-body person detection (helps when face is missed)
-            rects, _ = hog.detectMultiScale(frame, winStride=(8, 8), padding=(8, 8), scale=1.05)
+            rects, _ = self.hog.detectMultiScale(frame, winStride=(8, 8), padding=(8, 8), scale=1.05)
             if len(rects) == 0:
-                continue
+                return
             # filter by size, aspect ratio, and centrality to avoid scenery
             cand = []
             for (x, y, w, h) in rects:
@@ -94,13 +98,13 @@ def extract_person_refs(
                     continue
                 cand.append((x, y, w, h))
             if not cand:
-                continue
+                return
             x, y, w, h = max(cand, key=lambda b: b[2] * b[3])
         else:
-            continue
+            return
 
         # expand crop; optionally bias downward to include full body/outfit
-        if prefer_full_body:
+        if self.prefer_full_body:
             pad_x = int(w * 1.0)
             pad_top = int(h * 0.6)
             pad_bottom = int(h * 2.2)
@@ -118,12 +122,32 @@ def extract_person_refs(
 
         crop = frame[y0:y1, x0:x1]
         if crop.size == 0:
-            continue
+            return
 
-        saved += 1
-        p = out / f"ref_{saved:02d}.jpg"
+        p = self.out / f"ref_{len(self.refs) + 1:02d}.jpg"
         cv2.imwrite(str(p), crop)
-        refs.append(str(p))
+        self.refs.append(str(p))
+
 
-    cap.release()
-    return refs
+def extract_person_refs(
+    video_path: str,
+    out_dir: str | None = None,
+    max_refs: int = 6,
+    frame_stride: int = 15,
+    min_face_ratio: float = 0.08,
+    min_face_area_ratio: float = 0.005,
+    use_person_fallback: bool = True,
+    prefer_full_body: bool = True,
+):
+    collector = PersonRefCollector(
+        out_dir=out_dir,
+        max_refs=max_refs,
+        frame_stride=frame_stride,
+        min_face_ratio=min_face_ratio,
+        min_face_area_ratio=min_face_area_ratio,
+        use_person_fallback=use_person_fallback,
+        prefer_full_body=prefer_full_body,
+    )
+    if decode_pass(video_path, [collector]) is None:
+        return []
+    return collector.refs
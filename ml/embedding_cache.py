@@ -0,0 +1,65 @@
+"""
+Disk-backed cache of sentence embeddings.
+
+Rows live in `<VIRAL_CACHE_DIR>/embeddings.sqlite` (SqliteLRU, capped at
+EMBED_CACHE_MAX_MB) keyed by model name + text hash, as raw float32 bytes,
+so --resume-from-kie reruns and repeated prompts are never re-embedded.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import numpy as np
+
+from ml.feature_cache import CACHE_DIR, FEATURE_CACHE_ENABLED, SqliteLRU, text_digest
+
+EMBED_CACHE_MAX_BYTES = int(float(os.getenv("EMBED_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+_store = None
+
+
+def _embed_store() -> SqliteLRU:
+    global _store
+    if _store is None:
+        _store = SqliteLRU(CACHE_DIR / "embeddings.sqlite", EMBED_CACHE_MAX_BYTES)
+    return _store
+
+
+def cached_embeddings(model: str, texts: list[str], encode) -> np.ndarray | None:
+    """
+    float32 matrix (len(texts), dim) of embeddings in input order. Only texts
+    missing from the cache go to `encode(list_of_texts)`, in one batch
+    (duplicates encoded once). Returns None if `encode` returns None.
+    Cache errors never fail the caller.
+    """
+    texts = list(texts)
+    keys = [f"{model}|{text_digest(t)}" for t in texts]
+    found = {}
+    if FEATURE_CACHE_ENABLED:
+        try:
+            for k in dict.fromkeys(keys):
+                raw = _embed_store().get(k)
+                if raw is not None:
+                    found[k] = np.frombuffer(raw, dtype=np.float32)
+        except (sqlite3.Error, OSError):
+            found = {}
+
+    missing = {}
+    for k, t in zip(keys, texts):
+        if k not in found:
+            missing.setdefault(k, t)
+    if missing:
+        emb = encode(list(missing.values()))
+        if emb is None:
+            return None
+        emb = np.asarray(emb, dtype=np.float32)
+        for k, row in zip(missing, emb):
+            found[k] = row
+            if FEATURE_CACHE_ENABLED:
+                try:
+                    _embed_store().put(k, row.tobytes())
+                except (sqlite3.Error, OSError):
+                    pass
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([found[k] for k in keys])
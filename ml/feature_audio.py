@@ -1,17 +1,67 @@
 import librosa
 import numpy as np
 
-def extract_audio_features(audio_path: str) -> dict:
-    y, sr = librosa.load(audio_path, sr=22050, mono=True, duration=120)
+from ml.audio_asset import ANALYSIS_HOP, ANALYSIS_MAX_SEC, ANALYSIS_N_FFT, ANALYSIS_SR, AudioAsset
+from ml.feature_cache import cached_features, file_digest
 
-    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+# bump when the extractor output changes (invalidates ml.feature_cache entries)
+AUDIO_FEATURES_VERSION = "2"
+
+# upper edge of the "low band" (kick / bass) for low_band_ratio
+LOW_BAND_HZ = 250.0
+
+def _extract_audio_features(asset: AudioAsset) -> dict:
+    # one STFT of the first 120 s feeds every feature below (and the tempo on the asset)
+    y = asset.samples(ANALYSIS_SR, ANALYSIS_MAX_SEC)
+    sr = ANALYSIS_SR
+    S = asset.spectrogram()
+    power = S ** 2
+
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=ANALYSIS_N_FFT)
+    frame_mag = S.sum(axis=0)
+
+    tempo = asset.tempo
+    # time-domain RMS (framing only, no STFT); keeps the scale the scorer was trained on
     rms = float(np.mean(librosa.feature.rms(y=y)))
-    centroid = float(np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)))
+    # == librosa.feature.spectral_centroid(S=S), without its per-call normalization pass
+    centroid = float(np.mean((freqs @ S) / np.maximum(frame_mag, np.finfo(np.float32).tiny)))
     duration_sec = float(librosa.get_duration(y=y, sr=sr))
 
+    onsets = librosa.onset.onset_detect(onset_envelope=asset.onset_env, sr=sr, hop_length=ANALYSIS_HOP)
+    onset_density = len(onsets) / duration_sec if duration_sec > 0 else 0.0
+
+    # positive change of the normalized spectrum between frames (0..1)
+    flux = 0.0
+    if S.shape[1] > 1:
+        Sn = S / (frame_mag + 1e-10)
+        flux = float(np.mean(np.maximum(np.diff(Sn, axis=1), 0.0).sum(axis=0)))
+
+    total = float(power.sum())
+    low_band_ratio = float(power[freqs <= LOW_BAND_HZ].sum()) / total if total > 0 else 0.0
+
     return {
         "bpm": float(tempo),
         "duration_sec": duration_sec,
         "rms": rms,
         "spectral_centroid": centroid,
+        "onset_density": float(onset_density),
+        "spectral_flux": flux,
+        "low_band_ratio": low_band_ratio,
     }
+
+def extract_audio_features(audio_path: str, asset: AudioAsset | None = None) -> dict:
+    """
+    Pass `asset` to share the decoded song (and its tempo) with the remix engine.
+    """
+    if asset is None:
+        asset = AudioAsset(audio_path)
+    feats = cached_features(
+        "audio",
+        AUDIO_FEATURES_VERSION,
+        file_digest(audio_path),
+        {"sr": ANALYSIS_SR, "duration": ANALYSIS_MAX_SEC},
+        lambda: _extract_audio_features(asset),
+    )
+    # cache hit: later consumers reuse this tempo instead of beat tracking again
+    asset.seed_tempo(feats.get("bpm"))
+    return feats
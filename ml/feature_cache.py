@@ -0,0 +1,156 @@
+"""
+Persistent, content-addressed cache for extracted features.
+
+Keys combine a fast content hash of the input (or of the text), the extractor
+name/version and its parameters, so renamed re-uploads and --resume-from-kie
+reruns hit the cache while changed inputs or extractor updates miss it.
+Values live in one SQLite file with size-bounded LRU eviction; the cache dir
+is shared across jobs (VIRAL_CACHE_DIR, default outputs/cache).
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = Path(os.getenv("VIRAL_CACHE_DIR", "outputs/cache"))
+FEATURE_CACHE_ENABLED = os.getenv("FEATURE_CACHE", "1") != "0"
+FEATURE_CACHE_MAX_BYTES = int(float(os.getenv("FEATURE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+_CHUNK = 1 << 20        # head / tail bytes hashed
+_SAMPLE = 64 * 1024     # bytes per interior sample
+_N_SAMPLES = 8
+
+_digest_memo = {}
+
+
+def file_digest(path: str) -> str:
+    """
+    Fast content hash: size + first/last 1 MB + 8 interior 64 KB samples.
+    Cheap on multi-GB uploads, and memoized per (path, size, mtime) in-process.
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    hit = _digest_memo.get(memo_key)
+    if hit is not None:
+        return hit
+
+    size = st.st_size
+    h = hashlib.blake2b(digest_size=20)
+    h.update(str(size).encode())
+    with open(path, "rb") as f:
+        if size <= 2 * _CHUNK + _N_SAMPLES * _SAMPLE:
+            h.update(f.read())
+        else:
+            h.update(f.read(_CHUNK))
+            step = (size - 2 * _CHUNK) // (_N_SAMPLES + 1)
+            for i in range(1, _N_SAMPLES + 1):
+                f.seek(_CHUNK + i * step)
+                h.update(f.read(_SAMPLE))
+            f.seek(size - _CHUNK)
+            h.update(f.read(_CHUNK))
+    digest = h.hexdigest()
+    _digest_memo[memo_key] = digest
+    return digest
+
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=20).hexdigest()
+
+
+class SqliteLRU:
+    """bytes-valued key/value store in SQLite, evicting least recently used rows past `max_bytes`."""
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            return bytes(row[0])
+
+    def put(self, key: str, value: bytes):
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), len(value), time.time()),
+            )
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        over = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY last_access ASC"):
+            victims.append((key,))
+            freed += size
+            if freed >= over:
+                break
+        db.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+
+_store = None
+
+
+def _feature_store() -> SqliteLRU:
+    global _store
+    if _store is None:
+        _store = SqliteLRU(CACHE_DIR / "features.sqlite", FEATURE_CACHE_MAX_BYTES)
+    return _store
+
+
+def cached_features(kind: str, version: str, digest: str, params: dict, compute) -> dict:
+    """
+    Return the cached feature dict for (kind, version, digest, params), or
+    run `compute()` and store its result. Cache errors never fail extraction.
+    """
+    if not FEATURE_CACHE_ENABLED:
+        return compute()
+    key = hashlib.sha1(
+        json.dumps([kind, version, digest, params], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    try:
+        raw = _feature_store().get(key)
+        if raw is not None:
+            return json.loads(raw.decode("utf-8"))
+    except (sqlite3.Error, OSError, ValueError):
+        pass
+
+    feats = compute()
+    try:
+        _feature_store().put(key, json.dumps(feats).encode("utf-8"))
+    except (sqlite3.Error, OSError, TypeError, ValueError):
+        pass
+    return feats
@@ -3,6 +3,11 @@ import json
 import os
 from pathlib import Path
 
+from ml.feature_cache import cached_features, text_digest
+
+# bump when the extractor output changes (invalidates ml.feature_cache entries)
+TEXT_FEATURES_VERSION = "1"
+
 CTA_PATTERNS = [
     r"\bfollow\b", r"\blike\b", r"\bshare\b", r"\bcomment\b", r"\bsave\b",
     r"\bsubscribe\b", r"\btag\b", r"\bduet\b", r"\bstitch\b",
@@ -31,8 +36,18 @@ def _load_keyword_features():
     return {}
 
 _KW_FEATURES = _load_keyword_features()
+_KW_DIGEST = text_digest(json.dumps(_KW_FEATURES, sort_keys=True, ensure_ascii=False))
 
 def extract_text_features(text: str) -> dict:
+    return cached_features(
+        "text",
+        TEXT_FEATURES_VERSION,
+        text_digest(text),
+        {"keywords": _KW_DIGEST},
+        lambda: _extract_text_features(text),
+    )
+
+def _extract_text_features(text: str) -> dict:
     t = (text or "").lower()
 
     has_cta = 0
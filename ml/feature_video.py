@@ -1,84 +1,93 @@
-import cv2
-import numpy as np
-
-def extract_video_features(video_path: str, sample_every_n_frames: int = 5) -> dict:
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+import os
+
+from ml.feature_cache import cached_features, file_digest
+from ml.video_engine import DEFAULT_VIDEO_BACKEND, VideoAnalysis, VideoTimeline
+from ml.video_index import load_or_build_timeline
+
+# bump when the extractor output changes (invalidates ml.feature_cache entries)
+VIDEO_FEATURES_VERSION = "1"
+
+EMPTY_VIDEO_FEATURES = {
+    "avg_brightness": 0.0,
+    "cut_rate_per_min": 0.0,
+    "has_faces": 0.0,
+    "has_text_overlay": 0.0,
+}
+
+def extract_video_features(
+    video_path: str,
+    sample_every_n_frames: int = 5,
+    max_frames: int | None = None,
+    sample_fps: float | None = None,
+    analysis_short_side: int | None = None,
+    workers: int = 1,
+    prefetch: int | None = None,
+    backend: str | None = None,
+    sampling: str = "stride",
+    analysis: VideoAnalysis | VideoTimeline | None = None,
+    start_sec: float | None = None,
+    end_sec: float | None = None,
+    use_index: bool | None = None,
+) -> dict:
+    """
+    Pass `analysis` (a VideoAnalysis or VideoTimeline) to reuse an existing
+    decode pass instead of opening the video again. Otherwise the per-second
+    timeline index next to the video is used when present (see ml.video_index).
+    `start_sec` / `end_sec` restrict the features to a time range.
+    `max_frames` / `sample_fps` switch to sparse grab/seek sampling with a fixed
+    frame budget instead of decoding every N-th frame.
+    `analysis_short_side` analyses downscaled frames (faster on 1080p/4K footage).
+    `workers` > 1 analyses time ranges of the video in parallel processes.
+    `prefetch` is the background decode queue depth (0 = decode inline).
+    `backend` is "opencv" or "ffmpeg" (rawvideo pipe; falls back to OpenCV).
+    `sampling="adaptive"` samples coarsely and densifies only around scene cuts.
+    Without `analysis`, results are cached by content hash (ml.feature_cache).
+    """
+    if analysis is not None:
+        if isinstance(analysis, VideoAnalysis):
+            analysis = analysis.timeline()
+        return analysis.features(start_sec, end_sec)
+    if not os.path.exists(video_path):
         # kalau video tidak ada / gagal dibuka, isi default
-        return {
-            "avg_brightness": 0.0,
-            "cut_rate_per_min": 0.0,
-            "has_faces": 0.0,
-            "has_text_overlay": 0.0,
-        }
-
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
-    duration_sec = frame_count / fps if fps > 0 else 0.0
-
-    # Face detector (Haar)
-    face_cascade = cv2.CascadeClassifier(
-        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        return dict(EMPTY_VIDEO_FEATURES)
+
+    params = {
+        "sample_every_n_frames": int(sample_every_n_frames),
+        "max_frames": max_frames,
+        "sample_fps": sample_fps,
+        "analysis_short_side": analysis_short_side,
+        "backend": backend or DEFAULT_VIDEO_BACKEND,
+        "sampling": sampling,
+        "start_sec": start_sec,
+        "end_sec": end_sec,
+    }
+    return cached_features(
+        "video",
+        VIDEO_FEATURES_VERSION,
+        file_digest(video_path),
+        params,
+        lambda: _features_from_timeline(
+            video_path, sample_every_n_frames, max_frames, sample_fps, analysis_short_side,
+            workers, prefetch, backend, sampling, start_sec, end_sec, use_index,
+        ),
     )
 
-    prev_gray = None
-    brightness_vals = []
-    scene_changes = 0
-    face_hits = 0
-    sampled = 0
-
-    # text overlay heuristic: banyak edge di area bawah + kontras tinggi (rough)
-    text_overlay_hits = 0
-
-    idx = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        idx += 1
-        if idx % sample_every_n_frames != 0:
-            continue
-
-        sampled += 1
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        brightness_vals.append(float(np.mean(gray)))
-
-        # scene change heuristic (frame diff)
-        if prev_gray is not None:
-            diff = cv2.absdiff(gray, prev_gray)
-            if float(np.mean(diff)) > 20.0:  # threshold kasar
-                scene_changes += 1
-        prev_gray = gray
-
-        # faces
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-        if len(faces) > 0:
-            face_hits += 1
-
-        # text overlay heuristic (bottom third edges)
-        h, w = gray.shape
-        bottom = gray[int(h * 0.65):, :]
-        edges = cv2.Canny(bottom, 80, 160)
-        edge_density = float(np.mean(edges > 0))
-        if edge_density > 0.03:
-            text_overlay_hits += 1
-
-    cap.release()
-
-    avg_brightness = float(np.mean(brightness_vals)) if brightness_vals else 0.0
-
-    # cut_rate_per_min (approx)
-    minutes = (duration_sec / 60.0) if duration_sec > 0 else 0.0
-    cut_rate_per_min = float(scene_changes / minutes) if minutes > 0 else 0.0
-
-    has_faces = 1.0 if sampled > 0 and (face_hits / sampled) > 0.05 else 0.0
-    has_text_overlay = 1.0 if sampled > 0 and (text_overlay_hits / sampled) > 0.10 else 0.0
-
-    return {
-        "avg_brightness": avg_brightness,
-        "cut_rate_per_min": cut_rate_per_min,
-        "has_faces": has_faces,
-        "has_text_overlay": has_text_overlay,
-    }
+def _features_from_timeline(
+    video_path, sample_every_n_frames, max_frames, sample_fps, analysis_short_side,
+    workers, prefetch, backend, sampling, start_sec, end_sec, use_index,
+) -> dict:
+    timeline = load_or_build_timeline(
+        video_path,
+        sample_every_n_frames=sample_every_n_frames,
+        max_frames=max_frames,
+        sample_fps=sample_fps,
+        analysis_short_side=analysis_short_side,
+        workers=workers,
+        prefetch=prefetch,
+        backend=backend,
+        sampling=sampling,
+        use_index=use_index,
+    )
+    if timeline is None:
+        return dict(EMPTY_VIDEO_FEATURES)
+    return timeline.features(start_sec, end_sec)
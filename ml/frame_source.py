@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import cv2
+import numpy as np
+
+# default prefetch queue depth for video decoding (0 = decode on the analysis thread)
+DEFAULT_PREFETCH = int(os.getenv("VIDEO_PREFETCH", "4"))
+
+
+@dataclass
+class VideoMeta:
+    fps: float
+    frame_count: int
+    duration_sec: float
+    width: int = 0
+    height: int = 0
+
+
+class OpenCVFrameSource:
+    """
+    Sparse frame reader on top of cv2.VideoCapture.
+    `frames(next_target)` yields (index, bgr) for the indices `next_target(after)`
+    asks for: frames in between are only grab()-ed, long gaps are seeked over.
+    """
+
+    def __init__(self, video_path: str, seek_after_sec: float = 2.0):
+        self.cap = cv2.VideoCapture(video_path)
+        self.meta = None
+        if self.cap.isOpened():
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            self.meta = VideoMeta(
+                fps=float(fps),
+                frame_count=frame_count,
+                duration_sec=frame_count / fps if fps > 0 else 0.0,
+                width=int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0),
+                height=int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0),
+            )
+        self.seek_gap = None
+        if self.meta is not None and seek_after_sec:
+            self.seek_gap = max(1, int(seek_after_sec * self.meta.fps))
+
+    @property
+    def opened(self) -> bool:
+        return self.meta is not None
+
+    def frames(self, next_target):
+        cap = self.cap
+        pos = -1  # index of the last grabbed frame
+        try:
+            while True:
+                target = next_target(pos)
+                if target is None:
+                    break
+                gap = target - pos - 1
+                if self.seek_gap is not None and gap > self.seek_gap:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                else:
+                    ok = True
+                    for _ in range(gap):
+                        if not cap.grab():
+                            ok = False
+                            break
+                    if not ok:
+                        break
+                if not cap.grab():
+                    break
+                ret, frame = cap.retrieve()
+                pos = target
+                if ret:
+                    yield target, frame
+        finally:
+            self.close()
+
+    def close(self):
+        self.cap.release()
+
+
+def scaled_size(width: int, height: int, short_side: int | None) -> tuple[int, int]:
+    """(w, h) with the short side reduced to `short_side` (never upscales)."""
+    if not short_side or min(width, height) <= short_side:
+        return width, height
+    s = float(short_side) / float(min(width, height))
+    return max(1, int(round(width * s))), max(1, int(round(height * s)))
+
+
+class FFmpegFrameSource:
+    """
+    Gray frames from `ffmpeg -vf fps=...,scale=...,format=gray -f rawvideo pipe:`.
+    ffmpeg does decimation and downscaling in its decoder threads; each frame is
+    read into its own buffer and wrapped with np.frombuffer (no extra copy).
+    Yields (source_frame_index, gray) for every output frame.
+    """
+
+    def __init__(self, video_path: str, out_fps: float, short_side: int | None = None):
+        self.video_path = video_path
+        self.out_fps = float(out_fps)
+        probe = OpenCVFrameSource(video_path)
+        probe.close()
+        self.meta = probe.meta
+        self.size = None
+        if self.meta is not None and self.meta.width > 0 and self.meta.height > 0:
+            self.size = scaled_size(self.meta.width, self.meta.height, short_side)
+        self.proc = None
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which("ffmpeg") is not None
+
+    @property
+    def opened(self) -> bool:
+        return self.size is not None and self.out_fps > 0 and self.available()
+
+    @property
+    def scale(self) -> float:
+        """output / source size ratio."""
+        return self.size[0] / float(self.meta.width) if self.size else 1.0
+
+    def frames(self, next_target=None):
+        w, h = self.size
+        vf = f"fps={self.out_fps:.6f}"
+        if (w, h) != (self.meta.width, self.meta.height):
+            vf += f",scale={w}:{h}:flags=area"
+        vf += ",format=gray"
+        cmd = [
+            "ffmpeg", "-v", "error", "-nostdin",
+            "-i", self.video_path,
+            "-an", "-sn",
+            "-vf", vf,
+            "-f", "rawvideo", "-pix_fmt", "gray",
+            "pipe:1",
+        ]
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        stdout = self.proc.stdout
+        nbytes = w * h
+        k = 0
+        pos = -1
+        try:
+            while True:
+                if next_target is not None and next_target(pos) is None:
+                    break
+                buf = bytearray(nbytes)
+                view = memoryview(buf)
+                got = 0
+                while got < nbytes:
+                    n = stdout.readinto(view[got:])
+                    if not n:
+                        break
+                    got += n
+                if got < nbytes:
+                    break
+                pos = int(round(k / self.out_fps * self.meta.fps))
+                k += 1
+                yield pos, np.frombuffer(buf, dtype=np.uint8).reshape(h, w)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.proc is None:
+            return
+        if self.proc.poll() is None:
+            self.proc.kill()
+        if self.proc.stdout:
+            self.proc.stdout.close()
+        self.proc.wait()
+        self.proc = None
+
+
+class Prefetcher:
+    """
+    Runs an iterator on a background thread into a bounded queue, so decoding
+    item N+k overlaps with processing item N (OpenCV/ffmpeg release the GIL
+    while decoding). Iterate it like the wrapped iterator; call close() to stop early.
+    """
+
+    _END = object()
+
+    def __init__(self, iterable, depth: int = DEFAULT_PREFETCH):
+        self._q = queue.Queue(maxsize=max(1, int(depth)))
+        self._stop = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(iterable,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, iterable):
+        it = iter(iterable)
+        try:
+            for item in it:
+                if not self._put(item):
+                    break
+        except Exception as e:  # surfaced on the consumer thread
+            self._error = e
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+            self._put(self._END)
+
+    def __iter__(self):
+        while True:
+            item = self._q.get()
+            if item is self._END:
+                break
+            yield item
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        self._stop.set()
+        # drain so a blocked producer can notice the stop flag
+        while True:
+            try:
+                self._q.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join()
+
+
+def iter_frames(source, next_target, prefetch: int | None = None):
+    """
+    Yield (index, bgr) from `source`, decoding in a background thread when
+    `prefetch` > 0 (None = DEFAULT_PREFETCH, env VIDEO_PREFETCH).
+    Returns (iterator, closer).
+    """
+    depth = DEFAULT_PREFETCH if prefetch is None else int(prefetch)
+    frames = source.frames(next_target)
+    if depth <= 0:
+        return frames, frames.close
+    pf = Prefetcher(frames, depth)
+    return iter(pf), pf.close
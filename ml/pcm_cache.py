@@ -0,0 +1,104 @@
+"""
+Decoded mono PCM shared across jobs and processes.
+
+The API runs every job as its own `python main.py`, so one uploaded song used
+by several jobs used to be decoded once per job. Decoded float32 PCM is stored
+as `<VIRAL_CACHE_DIR>/pcm/pcm_<key>.npy` (key = content hash, sr, duration)
+and reopened with mmap_mode="r": processes share the page cache instead of
+each holding a private copy. The directory is capped at PCM_CACHE_MAX_MB,
+evicting least recently used files (access bumps the file mtime).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import numpy as np
+
+from ml.audio_io import load_pcm
+from ml.feature_cache import CACHE_DIR, file_digest
+
+PCM_CACHE_DIR = CACHE_DIR / "pcm"
+PCM_CACHE_ENABLED = os.getenv("PCM_CACHE", "1") != "0"
+PCM_CACHE_MAX_BYTES = int(float(os.getenv("PCM_CACHE_MAX_MB", "2048")) * 1024 * 1024)
+
+_evict_lock = threading.Lock()
+
+
+def _pcm_path(audio_path: str, sr: int, duration: float | None):
+    raw = f"{file_digest(audio_path)}|{int(sr)}|{'' if duration is None else float(duration)}"
+    return PCM_CACHE_DIR / f"pcm_{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24]}.npy"
+
+
+def _open(p) -> np.ndarray | None:
+    try:
+        y = np.load(p, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if y.dtype != np.float32 or y.ndim != 1:
+        return None
+    try:
+        os.utime(p)  # LRU clock
+    except OSError:
+        pass
+    return y
+
+
+def lookup_pcm(audio_path: str, sr: int, duration: float | None = None) -> np.ndarray | None:
+    """Cached PCM if present (never decodes)."""
+    if not PCM_CACHE_ENABLED:
+        return None
+    return _open(_pcm_path(audio_path, sr, duration))
+
+
+def cached_pcm(audio_path: str, sr: int, duration: float | None = None, compute=None) -> np.ndarray:
+    """
+    Mono float32 PCM of the first `duration` seconds (None = all) at `sr`,
+    memory-mapped read-only. On a miss it runs `compute()` (default: load_pcm)
+    and stores the result; cache errors fall back to the in-memory array.
+    """
+    if compute is None:
+        compute = lambda: load_pcm(audio_path, sr=sr, duration=duration)[0]
+    if not PCM_CACHE_ENABLED:
+        return compute()
+
+    p = _pcm_path(audio_path, sr, duration)
+    y = _open(p)
+    if y is not None:
+        return y
+
+    y = np.ascontiguousarray(compute(), dtype=np.float32)
+    try:
+        PCM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f"{p.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+        np.save(tmp, y)
+        os.replace(tmp, p)
+        _evict(keep=p)
+        mapped = _open(p)
+    except OSError:
+        mapped = None
+    return mapped if mapped is not None else y
+
+
+def _evict(keep=None):
+    with _evict_lock:
+        files = []
+        for f in PCM_CACHE_DIR.glob("pcm_*.npy"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, f))
+        total = sum(size for _, size, _ in files)
+        if total <= PCM_CACHE_MAX_BYTES:
+            return
+        for _, size, f in sorted(files, key=lambda r: r[0]):
+            if keep is not None and f == keep:
+                continue
+            try:
+                f.unlink()
+            except OSError:
+                continue  # still mapped elsewhere (Windows) or already gone
+            total -= size
+            if total <= PCM_CACHE_MAX_BYTES:
+                break
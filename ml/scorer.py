@@ -1,16 +1,33 @@
-import joblib
-import pandas as pd
+"""
+Virality / genre / audience models.
+
+The pickles are loaded on the first predict, not at construction, and with
+joblib's mmap_mode="r": arrays in uncompressed dumps are memory-mapped, so
+job processes scoring at the same time share them through the page cache.
+VIRALITY_MODEL_DIR (default models/) or the model_dir argument picks the
+directory; if any model is missing, predictions use the neutral fallback.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import os
+import threading
+import warnings
+import numpy as np
+
+MODEL_DIR = Path(os.getenv("VIRALITY_MODEL_DIR", "models"))
+MODEL_FILES = {
+    "virality_model": "virality_model.pkl",
+    "genre_model": "genre_model.pkl",
+    "audience_model": "audience_model.pkl",
+}
+
 
 class ViralityScorer:
-    def __init__(self):
-        try:
-            self.virality_model = joblib.load("models/virality_model.pkl")
-            self.genre_model = joblib.load("models/genre_model.pkl")
-            self.audience_model = joblib.load("models/audience_model.pkl")
-        except Exception:
-            self.virality_model = None
-            self.genre_model = None
-            self.audience_model = None
+    def __init__(self, model_dir: str | Path | None = None):
+        self.model_dir = Path(model_dir) if model_dir is not None else MODEL_DIR
+        self._models = None
+        self._lock = threading.Lock()
         self.genre_map = {
             0: "jedag_jedug",
             1: "tiktok_house",
@@ -25,40 +42,105 @@ class ViralityScorer:
             3: "casual_scroller",
             4: "story_seeker",
         }
+        self._cols = {}
+
+    def _load(self) -> dict:
+        # once per scorer; joblib (and sklearn behind it) is only imported when models exist
+        if self._models is not None:
+            return self._models
+        with self._lock:
+            if self._models is None:
+                paths = {name: self.model_dir / fname for name, fname in MODEL_FILES.items()}
+                models = {name: None for name in paths}
+                if all(p.exists() for p in paths.values()):
+                    try:
+                        import joblib
+
+                        with warnings.catch_warnings():
+                            # compressed dumps can't be mapped; joblib just reads them
+                            warnings.filterwarnings("ignore", message=".*mmap_mode.*")
+                            models = {name: joblib.load(p, mmap_mode="r") for name, p in paths.items()}
+                    except Exception:
+                        models = {name: None for name in paths}
+                self._models = models
+        return self._models
+
+    @property
+    def virality_model(self):
+        return self._load()["virality_model"]
 
-    def _make_X(self, model, feats: dict) -> pd.DataFrame:
-        cols = list(getattr(model, "feature_names_in_", []))
+    @property
+    def genre_model(self):
+        return self._load()["genre_model"]
+
+    @property
+    def audience_model(self):
+        return self._load()["audience_model"]
+
+    def _columns(self, model) -> list:
+        # feature order the model was fitted with, looked up once per model
+        key = id(model)
+        cols = self._cols.get(key)
+        if cols is None:
+            cols = list(getattr(model, "feature_names_in_", []))
+            self._cols[key] = cols
+        return cols
+
+    def _make_X(self, model, rows: list[dict]) -> np.ndarray:
+        cols = self._columns(model)
         if not cols:
             # fallback (harusnya tidak kejadian di model kamu)
-            cols = sorted(feats.keys())
+            cols = sorted({k for feats in rows for k in feats})
+
+        X = np.zeros((len(rows), len(cols)), dtype=np.float64)
+        for i, feats in enumerate(rows):
+            X[i] = [float(feats.get(c, 0.0)) for c in cols]
+        return X
 
-        row = {c: float(feats.get(c, 0.0)) for c in cols}
-        return pd.DataFrame([row], columns=cols)
+    def _call(self, fn, X: np.ndarray):
+        # columns are already in feature_names_in_ order; skip sklearn's name check warning
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            return fn(X)
 
     def predict(self, feats: dict) -> dict:
+        return self.predict_batch([feats])[0]
+
+    def predict_batch(self, rows: list[dict]) -> list[dict]:
+        """
+        predict() for many feature dicts: one matrix and one call per model
+        for the whole batch. Results are in input order.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
         if not self.virality_model or not self.genre_model or not self.audience_model:
-            return {
+            return [{
                 "virality_score": 50.0,
                 "genre": -1,
                 "genre_label": "unknown",
                 "audience": -1,
                 "audience_label": "unknown",
-            }
-        Xv = self._make_X(self.virality_model, feats)
-        Xg = self._make_X(self.genre_model, feats)
-        Xa = self._make_X(self.audience_model, feats)
+            } for _ in rows]
+        Xv = self._make_X(self.virality_model, rows)
+        Xg = self._make_X(self.genre_model, rows)
+        Xa = self._make_X(self.audience_model, rows)
 
-        proba = self.virality_model.predict_proba(Xv)[0]
+        proba = self._call(self.virality_model.predict_proba, Xv)
         # ambil proba kelas 1 kalau ada
         classes = list(getattr(self.virality_model, "classes_", [0, 1]))
-        idx = classes.index(1) if 1 in classes else (1 if len(proba) > 1 else 0)
-
-        genre_id = int(self.genre_model.predict(Xg)[0])
-        audience_id = int(self.audience_model.predict(Xa)[0])
-        return {
-            "virality_score": float(proba[idx] * 100.0),
-            "genre": genre_id,
-            "genre_label": self.genre_map.get(genre_id, f"unknown_{genre_id}"),
-            "audience": audience_id,
-            "audience_label": self.audience_map.get(audience_id, f"unknown_{audience_id}"),
-        }
+        idx = classes.index(1) if 1 in classes else (1 if proba.shape[1] > 1 else 0)
+
+        genre_ids = self._call(self.genre_model.predict, Xg)
+        audience_ids = self._call(self.audience_model.predict, Xa)
+        out = []
+        for p, g, a in zip(proba[:, idx], genre_ids, audience_ids):
+            genre_id, audience_id = int(g), int(a)
+            out.append({
+                "virality_score": float(p * 100.0),
+                "genre": genre_id,
+                "genre_label": self.genre_map.get(genre_id, f"unknown_{genre_id}"),
+                "audience": audience_id,
+                "audience_label": self.audience_map.get(audience_id, f"unknown_{audience_id}"),
+            })
+        return out
@@ -0,0 +1,310 @@
+"""
+Long-lived local scoring / embedding service.
+
+Every API job is its own `python main.py`, and each one used to load the
+scorer pickles and the MiniLM sentence encoder before doing any work. This
+service keeps one ViralityScorer and one SentenceTransformer warm and serves
+batched requests over a Unix domain socket:
+
+    python -m ml.scoring_service [--socket PATH]
+
+Protocol: each message is a 4-byte big-endian length followed by UTF-8 JSON.
+    {"op": "ping"}                          -> {"ok": true}
+    {"op": "score", "rows": [{...}, ...]}   -> {"ok": true, "result": [pred, ...]}
+    {"op": "embed", "texts": ["...", ...]}  -> {"ok": true, "result": [[float, ...], ...]}
+Errors come back as {"ok": false, "error": "..."}.
+
+Pipeline code goes through ScoringClient / get_scorer(): when nothing listens
+on SCORING_SOCKET (default <VIRAL_CACHE_DIR>/scoring.sock), or the platform
+has no AF_UNIX, everything runs in-process as before.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import numpy as np
+
+from ml.feature_cache import CACHE_DIR
+
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SCORING_SOCKET = os.getenv("SCORING_SOCKET", str(CACHE_DIR / "scoring.sock"))
+SCORING_SERVICE_ENABLED = os.getenv("SCORING_SERVICE", "1") != "0"
+
+_HEADER = struct.Struct(">I")
+_MAX_MESSAGE = 256 * 1024 * 1024
+
+
+def _jsonable(o):
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, Path):
+        return str(o)
+    raise TypeError(f"not JSON serializable: {type(o).__name__}")
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes | None:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, obj) -> None:
+    data = json.dumps(obj, default=_jsonable).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock: socket.socket):
+    head = _recv_exact(sock, _HEADER.size)
+    if head is None:
+        return None
+    (n,) = _HEADER.unpack(head)
+    if n > _MAX_MESSAGE:
+        raise ValueError(f"message too large: {n} bytes")
+    body = _recv_exact(sock, n)
+    if body is None:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+
+def load_embedder():
+    """SentenceTransformer used for prompt relevance, or None if unavailable."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except Exception:
+        return None
+    try:
+        return SentenceTransformer(EMBED_MODEL)
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------- server
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                req = recv_message(self.request)
+            except (OSError, ValueError):
+                return
+            if req is None:
+                return
+            try:
+                resp = {"ok": True, "result": self.server.dispatch(req)}
+            except Exception as e:
+                resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            try:
+                send_message(self.request, resp)
+            except OSError:
+                return
+
+
+class ScoringServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, scorer=None, embedder=None):
+        if scorer is None:
+            from ml.scorer import ViralityScorer
+
+            scorer = ViralityScorer()
+        self.scorer = scorer
+        self.embedder = embedder
+        # the encoder isn't thread-safe enough to share across handler threads
+        self._embed_lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.unlink(path)  # stale socket from a previous run
+        except FileNotFoundError:
+            pass
+        super().__init__(path, _Handler)
+
+    def dispatch(self, req: dict):
+        op = req.get("op")
+        if op == "ping":
+            return {"embed": self.embedder is not None}
+        if op == "score":
+            return self.scorer.predict_batch(req.get("rows") or [])
+        if op == "embed":
+            if self.embedder is None:
+                raise RuntimeError("embedding model not loaded")
+            texts = [str(t) for t in req.get("texts") or []]
+            with self._embed_lock:
+                emb = self.embedder.encode(texts, normalize_embeddings=True)
+            return np.asarray(emb, dtype=np.float32).tolist()
+        raise ValueError(f"unknown op: {op!r}")
+
+
+def serve(path: str = SCORING_SOCKET):
+    server = ScoringServer(path, embedder=load_embedder())
+    server.scorer.predict_batch([{}])  # load the pickles now, not on the first job
+    print(f"[SCORING] listening on {path} (embed={'yes' if server.embedder is not None else 'no'})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------- client
+
+class ScoringClient:
+    """
+    Connection to a running service. Calls raise OSError when it's gone;
+    callers fall back to in-process models.
+    """
+
+    def __init__(self, path: str = SCORING_SOCKET, timeout: float = 60.0):
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self, timeout: float) -> socket.socket:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("AF_UNIX sockets are not available on this platform")
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(timeout)
+        try:
+            s.connect(self.path)
+        except OSError:
+            s.close()
+            raise
+        s.settimeout(self.timeout)
+        return s
+
+    def request(self, req: dict):
+        with self._lock:
+            if self._sock is None:
+                self._sock = self._connect(self.timeout)
+            try:
+                send_message(self._sock, req)
+                resp = recv_message(self._sock)
+            except (OSError, ValueError):
+                self.close()
+                raise OSError("scoring service connection lost")
+            if resp is None:
+                self.close()
+                raise OSError("scoring service closed the connection")
+        if not resp.get("ok"):
+            raise RuntimeError(resp.get("error") or "scoring service error")
+        return resp.get("result")
+
+    def ping(self, timeout: float = 0.5) -> dict | None:
+        """Service info, or None when nothing is listening."""
+        with self._lock:
+            if self._sock is None:
+                try:
+                    self._sock = self._connect(timeout)
+                except OSError:
+                    return None
+        try:
+            return self.request({"op": "ping"})
+        except (OSError, RuntimeError):
+            return None
+
+    def score(self, rows: list[dict]) -> list[dict]:
+        return self.request({"op": "score", "rows": list(rows)})
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Normalized embeddings, shape (len(texts), dim)."""
+        return np.asarray(self.request({"op": "embed", "texts": list(texts)}), dtype=np.float32)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+_client = None
+_client_info = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ScoringClient | None:
+    """Shared client if the service is enabled and answering, else None (checked once)."""
+    global _client, _client_info
+    if not SCORING_SERVICE_ENABLED:
+        return None
+    with _client_lock:
+        if _client_info is None:
+            client = ScoringClient()
+            info = client.ping()
+            _client_info = info if info is not None else {}
+            _client = client if info is not None else None
+        return _client
+
+
+def embed_available() -> bool:
+    """True when the service answers and has the embedding model loaded."""
+    return get_client() is not None and bool((_client_info or {}).get("embed"))
+
+
+class RemoteScorer:
+    """
+    ViralityScorer interface backed by the service, falling back to a local
+    ViralityScorer (loaded on first use) if a request fails.
+    """
+
+    def __init__(self, client: ScoringClient):
+        self.client = client
+        self._local = None
+
+    def _fallback(self):
+        if self._local is None:
+            from ml.scorer import ViralityScorer
+
+            self._local = ViralityScorer()
+        return self._local
+
+    def predict(self, feats: dict) -> dict:
+        return self.predict_batch([feats])[0]
+
+    def predict_batch(self, rows: list[dict]) -> list[dict]:
+        rows = list(rows)
+        if not rows:
+            return []
+        if self._local is None:
+            try:
+                return self.client.score(rows)
+            except (OSError, RuntimeError, TypeError) as e:
+                print(f"[SCORING] service unavailable ({e}); scoring in-process")
+        return self._fallback().predict_batch(rows)
+
+
+def get_scorer():
+    """Scorer for a pipeline run: the warm service when it's up, else in-process."""
+    client = get_client()
+    if client is not None:
+        return RemoteScorer(client)
+    from ml.scorer import ViralityScorer
+
+    return ViralityScorer()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve ViralityScorer + sentence embeddings over a Unix socket.")
+    ap.add_argument("--socket", default=SCORING_SOCKET, help="socket path (default: SCORING_SOCKET)")
+    args = ap.parse_args()
+    serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,636 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+import os
+import cv2
+import numpy as np
+
+from ml.frame_source import FFmpegFrameSource, OpenCVFrameSource, VideoMeta, iter_frames
+
+# heuristics shared by feature extraction, best-segment trimming and ref crops
+SCENE_DIFF_THRESHOLD = 20.0   # mean absdiff antar sample -> dianggap cut
+TEXT_EDGE_THRESHOLD = 0.03    # edge density area bawah -> dianggap ada text overlay
+FACE_SCALE_FACTOR = 1.1
+FACE_MIN_NEIGHBORS = 4
+
+# adaptive sampling: thumbnail diff between coarse samples that triggers densifying
+ADAPTIVE_SPIKE_THRESHOLD = 10.0
+ADAPTIVE_THUMB_WIDTH = 64
+
+# default analysis resolution for the scoring path (short side in px)
+DEFAULT_ANALYSIS_SHORT_SIDE = 360
+# "opencv" (cv2.VideoCapture) or "ffmpeg" (rawvideo pipe, gray + scaled by ffmpeg)
+DEFAULT_VIDEO_BACKEND = os.getenv("VIDEO_BACKEND", "opencv")
+
+
+@lru_cache(maxsize=None)
+def load_cascade(name: str) -> cv2.CascadeClassifier:
+    """Load a Haar cascade once per process."""
+    return cv2.CascadeClassifier(cv2.data.haarcascades + name)
+
+
+class SampledFrame:
+    """
+    One decoded frame handed to every tap that asked for it.
+    Grayscale conversion and face detection are computed lazily and only once.
+
+    With `short_side` set, `small_gray` is a downscaled copy used for analysis
+    (brightness, diff, Canny, Haar); `faces` are still reported in original
+    frame coordinates. Frames from a gray-only backend (ffmpeg) pass `gray`
+    (already at analysis size) and its `scale` instead of `bgr`.
+    """
+
+    __slots__ = ("index", "t", "bgr", "short_side", "_gray", "_small_gray", "_faces", "_scale")
+
+    def __init__(
+        self,
+        index: int,
+        t: float,
+        bgr: np.ndarray | None,
+        short_side: int | None = None,
+        gray: np.ndarray | None = None,
+        scale: float = 1.0,
+    ):
+        self.index = index
+        self.t = t
+        self.bgr = bgr
+        self.short_side = short_side
+        self._gray = None
+        self._small_gray = None
+        self._faces = None
+        self._scale = None
+        if bgr is None:
+            self._small_gray = gray
+            self._scale = float(scale)
+            if self._scale >= 1.0:
+                self._gray = gray
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Full-resolution grayscale."""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def scale(self) -> float:
+        """analysis / original size ratio (1.0 = full resolution)."""
+        if self._scale is not None:
+            return self._scale
+        if not self.short_side:
+            return 1.0
+        h, w = self.bgr.shape[:2]
+        return min(1.0, float(self.short_side) / float(min(h, w)))
+
+    @property
+    def small_gray(self) -> np.ndarray:
+        """Grayscale at analysis resolution."""
+        if self._small_gray is None:
+            s = self.scale
+            if s >= 1.0:
+                self._small_gray = self.gray
+            else:
+                h, w = self.bgr.shape[:2]
+                size = (max(1, int(round(w * s))), max(1, int(round(h * s))))
+                small = cv2.resize(self.bgr, size, interpolation=cv2.INTER_AREA)
+                self._small_gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return self._small_gray
+
+    @property
+    def faces(self):
+        """Haar face boxes (x, y, w, h) in original frame coordinates."""
+        if self._faces is None:
+            cascade = load_cascade("haarcascade_frontalface_default.xml")
+            faces = cascade.detectMultiScale(self.small_gray, FACE_SCALE_FACTOR, FACE_MIN_NEIGHBORS)
+            s = self.scale
+            if s < 1.0 and len(faces) > 0:
+                faces = np.round(np.asarray(faces, dtype=np.float64) / s).astype(np.int32)
+            self._faces = faces
+        return self._faces
+
+
+# per-second timeline row; value columns are per-second sums (divide by `samples` for means)
+TIMELINE_DTYPE = np.dtype([
+    ("samples", "<i4"),        # sampled frames in this second
+    ("brightness", "<f8"),     # sum of mean gray
+    ("motion", "<f8"),         # sum of frame diffs vs previous sample
+    ("cuts", "<i4"),           # diffs above SCENE_DIFF_THRESHOLD
+    ("face_hits", "<i4"),      # samples with >= 1 face
+    ("faces", "<i4"),          # total faces detected
+    ("edge_density", "<f8"),   # sum of bottom-third edge density
+    ("text_hits", "<i4"),      # samples above TEXT_EDGE_THRESHOLD
+])
+
+
+@dataclass
+class VideoTimeline:
+    """
+    Per-second summary of a video (one TIMELINE_DTYPE row per second).
+    Answers feature / best-segment questions for any time range without
+    decoding; `bins` may be a read-only memmap (see ml.video_index).
+    """
+
+    meta: VideoMeta
+    bins: np.ndarray
+
+    def _range(self, start_sec: float | None, end_sec: float | None) -> tuple[np.ndarray, float]:
+        n = len(self.bins)
+        a = 0 if start_sec is None else max(0, int(start_sec))
+        b = n if end_sec is None else min(n, int(np.ceil(end_sec)))
+        if start_sec is None and end_sec is None:
+            span = self.meta.duration_sec
+        else:
+            lo = 0.0 if start_sec is None else float(start_sec)
+            hi = self.meta.duration_sec if end_sec is None else min(float(end_sec), self.meta.duration_sec)
+            span = max(0.0, hi - lo)
+        return self.bins[a:max(a, b)], span
+
+    def features(self, start_sec: float | None = None, end_sec: float | None = None) -> dict:
+        rows, span = self._range(start_sec, end_sec)
+        sampled = int(rows["samples"].sum())
+        avg_brightness = float(rows["brightness"].sum() / sampled) if sampled else 0.0
+
+        scene_changes = int(rows["cuts"].sum())
+        minutes = (span / 60.0) if span > 0 else 0.0
+        cut_rate_per_min = float(scene_changes / minutes) if minutes > 0 else 0.0
+
+        face_hits = int(rows["face_hits"].sum())
+        text_overlay_hits = int(rows["text_hits"].sum())
+        has_faces = 1.0 if sampled > 0 and (face_hits / sampled) > 0.05 else 0.0
+        has_text_overlay = 1.0 if sampled > 0 and (text_overlay_hits / sampled) > 0.10 else 0.0
+
+        return {
+            "avg_brightness": avg_brightness,
+            "cut_rate_per_min": cut_rate_per_min,
+            "has_faces": has_faces,
+            "has_text_overlay": has_text_overlay,
+        }
+
+    def best_segment_starts(self, durations) -> dict[float, float]:
+        """
+        Best start second for every target duration, scored as in the old
+        sliding window (motion + 50 * face hits) but with one prefix sum shared
+        by all durations instead of an O(n*w) loop per duration.
+        """
+        score = self.bins["motion"] + self.bins["face_hits"] * 50.0
+        n = len(score)
+        csum = np.concatenate(([0.0], np.cumsum(score)))
+        out = {}
+        for d in durations:
+            if self.meta.duration_sec <= d or d <= 0:
+                out[d] = 0.0
+                continue
+            window = max(1, int(d))
+            starts = np.arange(0, max(1, n - window))
+            sums = csum[np.minimum(starts + window, n)] - csum[starts]
+            out[d] = float(np.argmax(sums))
+        return out
+
+    def best_segment_start(self, target_dur: float) -> float:
+        return self.best_segment_starts([target_dur])[target_dur]
+
+
+@dataclass
+class VideoAnalysis:
+    """Per-sample signals of one decode pass (arrays are aligned by sample)."""
+
+    meta: VideoMeta
+    t: np.ndarray             # sample time (sec)
+    brightness: np.ndarray    # mean gray
+    diff: np.ndarray          # mean absdiff vs previous sample (nan for the first one)
+    faces: np.ndarray         # jumlah wajah terdeteksi
+    edge_density: np.ndarray  # Canny density di sepertiga bawah frame
+
+    @property
+    def sampled(self) -> int:
+        return int(len(self.t))
+
+    def timeline(self) -> VideoTimeline:
+        n_bins = int(self.meta.duration_sec) + 2
+        bins = np.zeros(n_bins, dtype=TIMELINE_DTYPE)
+        if self.sampled:
+            sec = np.clip(self.t.astype(np.int64), 0, n_bins - 1)
+            has_diff = ~np.isnan(self.diff)
+            diff = np.where(has_diff, self.diff, 0.0)
+
+            def _sum(weights):
+                return np.bincount(sec, weights=weights, minlength=n_bins)[:n_bins]
+
+            bins["samples"] = np.bincount(sec, minlength=n_bins)[:n_bins]
+            bins["brightness"] = _sum(self.brightness)
+            bins["motion"] = _sum(diff)
+            bins["cuts"] = _sum((has_diff & (diff > SCENE_DIFF_THRESHOLD)).astype(np.float64))
+            bins["face_hits"] = _sum((self.faces > 0).astype(np.float64))
+            bins["faces"] = _sum(self.faces.astype(np.float64))
+            bins["edge_density"] = _sum(self.edge_density)
+            bins["text_hits"] = _sum((self.edge_density > TEXT_EDGE_THRESHOLD).astype(np.float64))
+        return VideoTimeline(meta=self.meta, bins=bins)
+
+    def features(self) -> dict:
+        return self.timeline().features()
+
+    def best_segment_starts(self, durations) -> dict[float, float]:
+        return self.timeline().best_segment_starts(durations)
+
+    def best_segment_start(self, target_dur: float) -> float:
+        return self.timeline().best_segment_start(target_dur)
+
+
+def next_strided(after: int, stride: int) -> int:
+    """Smallest index > `after` with (index + 1) % stride == 0 (same as the old `idx % n` loops)."""
+    return ((after + 1) // stride + 1) * stride - 1
+
+
+def plan_sample_indices(
+    meta: VideoMeta,
+    sample_every_n_frames: int = 5,
+    max_frames: int | None = None,
+    sample_fps: float | None = None,
+) -> np.ndarray | None:
+    """
+    Frame indices to sample. `max_frames` spreads a fixed budget over the whole
+    video, `sample_fps` samples at a fixed rate. Returns None for plain
+    every-N-th-frame striding or when the frame count is unknown, in which case
+    the caller strides until EOF (container frame counts are not always exact).
+    """
+    n = meta.frame_count
+    if n <= 0 or not (max_frames or sample_fps):
+        return None
+    if max_frames:
+        k = max(1, min(int(max_frames), n))
+        return np.unique(np.round(np.linspace(0, n - 1, k)).astype(np.int64))
+    if sample_fps and sample_fps > 0 and meta.fps > 0:
+        step = max(1.0, meta.fps / float(sample_fps))
+        return np.unique(np.round(np.arange(step - 1.0, n, step)).astype(np.int64))
+    return None
+
+
+class FeatureTap:
+    """Collects brightness / scene-change / face / text-overlay signals on sampled frames."""
+
+    done = False
+
+    def __init__(
+        self,
+        sample_every_n_frames: int = 5,
+        max_frames: int | None = None,
+        sample_fps: float | None = None,
+        indices: np.ndarray | None = None,
+    ):
+        self.stride = max(1, int(sample_every_n_frames))
+        self.max_frames = max_frames
+        self.sample_fps = sample_fps
+        self._fixed_plan = indices is not None
+        self._plan = np.asarray(indices, dtype=np.int64) if indices is not None else None
+        self._t = []
+        self._brightness = []
+        self._diff = []
+        self._faces = []
+        self._edges = []
+        self._prev_gray = None
+
+    def start(self, meta: VideoMeta):
+        if self._fixed_plan:
+            return
+        self._plan = plan_sample_indices(meta, self.stride, self.max_frames, self.sample_fps)
+
+    def next_index(self, after: int) -> int | None:
+        if self._plan is None:
+            return next_strided(after, self.stride)
+        i = int(np.searchsorted(self._plan, after, side="right"))
+        return int(self._plan[i]) if i < len(self._plan) else None
+
+    def consume(self, fr: SampledFrame):
+        gray = fr.small_gray
+        self._t.append(fr.t)
+        self._brightness.append(float(np.mean(gray)))
+
+        # scene change heuristic (frame diff)
+        if self._prev_gray is not None:
+            self._diff.append(float(np.mean(cv2.absdiff(gray, self._prev_gray))))
+        else:
+            self._diff.append(np.nan)
+        self._prev_gray = gray
+
+        self._faces.append(len(fr.faces))
+
+        # text overlay heuristic: banyak edge di area bawah + kontras tinggi (rough)
+        h = gray.shape[0]
+        bottom = gray[int(h * 0.65):, :]
+        edges = cv2.Canny(bottom, 80, 160)
+        # edges are ~1px wide, so density grows as 1/scale on a downscaled frame;
+        # keep it in full-res units so TEXT_EDGE_THRESHOLD means the same thing
+        self._edges.append(float(np.mean(edges > 0)) * fr.scale)
+
+    def result(self, meta: VideoMeta) -> VideoAnalysis:
+        return VideoAnalysis(
+            meta=meta,
+            t=np.asarray(self._t, dtype=np.float64),
+            brightness=np.asarray(self._brightness, dtype=np.float64),
+            diff=np.asarray(self._diff, dtype=np.float64),
+            faces=np.asarray(self._faces, dtype=np.int32),
+            edge_density=np.asarray(self._edges, dtype=np.float64),
+        )
+
+
+class AdaptiveFeatureTap(FeatureTap):
+    """
+    FeatureTap that analyses only every `coarse_factor`-th fine sample unless
+    the scene is changing. Fine-stride frames in between are held back (not
+    analysed); if the cheap thumbnail diff between two coarse samples spikes,
+    the held frames are analysed too, so fast-cut edits keep their cut count
+    while static/talking-head shots cost ~1/coarse_factor of the Haar/Canny work.
+    Forward-only: no extra seeking, works with prefetch and the ffmpeg backend.
+    """
+
+    def __init__(
+        self,
+        sample_every_n_frames: int = 5,
+        coarse_factor: int = 3,
+        spike_threshold: float = ADAPTIVE_SPIKE_THRESHOLD,
+    ):
+        super().__init__(sample_every_n_frames)
+        self.coarse_factor = max(1, int(coarse_factor))
+        self.spike_threshold = float(spike_threshold)
+        self.seen = 0          # fine-stride frames received
+        self._held = []
+        self._last_thumb = None
+
+    def _thumb(self, fr: SampledFrame) -> np.ndarray:
+        g = fr.small_gray
+        h, w = g.shape[:2]
+        tw = min(ADAPTIVE_THUMB_WIDTH, w)
+        th = max(1, int(round(h * tw / float(w))))
+        return cv2.resize(g, (tw, th), interpolation=cv2.INTER_AREA)
+
+    def _checkpoint(self, fr: SampledFrame):
+        thumb = self._thumb(fr)
+        prev, self._last_thumb = self._last_thumb, thumb
+        spike = prev is not None and float(np.mean(cv2.absdiff(thumb, prev))) > self.spike_threshold
+        if spike:
+            for held in self._held:
+                super().consume(held)
+        self._held = []
+        super().consume(fr)
+
+    def consume(self, fr: SampledFrame):
+        self.seen += 1
+        if self.seen % self.coarse_factor == 0:
+            self._checkpoint(fr)
+        else:
+            self._held.append(fr)
+
+    def result(self, meta: VideoMeta) -> VideoAnalysis:
+        if self._held:
+            # tail after the last coarse sample: close it like a coarse point
+            last = self._held.pop()
+            self._checkpoint(last)
+        return super().result(meta)
+
+
+def decode_pass(
+    video_path: str,
+    taps,
+    seek_after_sec: float = 2.0,
+    analysis_short_side: int | None = None,
+    prefetch: int | None = None,
+) -> VideoMeta | None:
+    """
+    Decode the video once and feed every frame some tap asked for.
+    A tap exposes `next_index(after)`, `consume(SampledFrame)`, a `done` flag
+    and optionally `start(meta)`; decoding stops once every tap is done.
+
+    Frames nobody wants are only grab()-ed (no retrieve/colour conversion);
+    gaps longer than `seek_after_sec` are skipped with a seek instead.
+    `analysis_short_side` downscales the analysis copy of each frame (see SampledFrame).
+    `prefetch` is the background decode queue depth (0 = off, None = VIDEO_PREFETCH).
+    """
+    source = OpenCVFrameSource(video_path, seek_after_sec=seek_after_sec)
+    if not source.opened:
+        source.close()
+        return None
+
+    meta = source.meta
+    for tp in taps:
+        if hasattr(tp, "start"):
+            tp.start(meta)
+
+    def next_target(after: int) -> int | None:
+        targets = [n for n in (tp.next_index(after) for tp in taps if not tp.done) if n is not None]
+        return min(targets) if targets else None
+
+    frames, close = iter_frames(source, next_target, prefetch=prefetch)
+    try:
+        for idx, frame in frames:
+            wanted = [tp for tp in taps if not tp.done and tp.next_index(idx - 1) == idx]
+            if not wanted:
+                if all(tp.done for tp in taps):
+                    break
+                continue
+            fr = SampledFrame(idx, idx / meta.fps, frame, short_side=analysis_short_side)
+            for tp in wanted:
+                tp.consume(fr)
+    finally:
+        close()
+        source.close()
+    return meta
+
+
+def _analyze_shard(
+    video_path: str,
+    indices: np.ndarray,
+    warmup: bool,
+    analysis_short_side: int | None,
+    prefetch: int | None,
+) -> dict:
+    """
+    Worker: analyse one time range. With `warmup`, indices[0] is the previous
+    shard's last sample; it is decoded only so the first real sample gets the
+    same frame diff as in a serial pass, then dropped.
+    """
+    cv2.setNumThreads(1)  # one process per core already
+    tap = FeatureTap(indices=indices)
+    if decode_pass(video_path, [tap], analysis_short_side=analysis_short_side, prefetch=prefetch) is None:
+        return {}
+    part = tap.result(VideoMeta(0.0, 0, 0.0))
+    k = 1 if warmup else 0
+    return {
+        "t": part.t[k:],
+        "brightness": part.brightness[k:],
+        "diff": part.diff[k:],
+        "faces": part.faces[k:],
+        "edge_density": part.edge_density[k:],
+    }
+
+
+def _analyze_sharded(
+    video_path: str,
+    meta: VideoMeta,
+    plan: np.ndarray,
+    workers: int,
+    analysis_short_side: int | None,
+    prefetch: int | None,
+) -> VideoAnalysis | None:
+    chunks = [c for c in np.array_split(plan, workers) if len(c)]
+    jobs = []
+    for i, c in enumerate(chunks):
+        if i == 0:
+            jobs.append((c, False))
+        else:
+            prev_last = chunks[i - 1][-1]
+            jobs.append((np.concatenate(([prev_last], c)), True))
+
+    with ProcessPoolExecutor(max_workers=len(jobs)) as ex:
+        futs = [ex.submit(_analyze_shard, video_path, idx, warm, analysis_short_side, prefetch) for idx, warm in jobs]
+        parts = [f.result() for f in futs]
+    if any(not p for p in parts):
+        return None
+
+    return VideoAnalysis(
+        meta=meta,
+        t=np.concatenate([p["t"] for p in parts]),
+        brightness=np.concatenate([p["brightness"] for p in parts]),
+        diff=np.concatenate([p["diff"] for p in parts]),
+        faces=np.concatenate([p["faces"] for p in parts]),
+        edge_density=np.concatenate([p["edge_density"] for p in parts]),
+    )
+
+
+def probe_video_meta(video_path: str) -> VideoMeta | None:
+    source = OpenCVFrameSource(video_path)
+    source.close()
+    return source.meta
+
+
+def _ffmpeg_out_fps(
+    meta: VideoMeta,
+    sample_every_n_frames: int,
+    max_frames: int | None,
+    sample_fps: float | None,
+) -> float:
+    if max_frames and meta.duration_sec > 0:
+        return min(meta.fps, max_frames / meta.duration_sec)
+    if sample_fps and sample_fps > 0:
+        return min(meta.fps, float(sample_fps))
+    return meta.fps / max(1, int(sample_every_n_frames))
+
+
+def _make_feature_tap(
+    sampling: str,
+    sample_every_n_frames: int,
+    max_frames: int | None = None,
+    sample_fps: float | None = None,
+) -> FeatureTap:
+    if sampling == "adaptive":
+        return AdaptiveFeatureTap(sample_every_n_frames)
+    return FeatureTap(sample_every_n_frames, max_frames=max_frames, sample_fps=sample_fps)
+
+
+def _analyze_ffmpeg(
+    video_path: str,
+    sample_every_n_frames: int,
+    max_frames: int | None,
+    sample_fps: float | None,
+    analysis_short_side: int | None,
+    prefetch: int | None,
+    sampling: str = "stride",
+) -> VideoAnalysis | None:
+    """FeatureTap fed from an ffmpeg rawvideo pipe; None if ffmpeg can't be used."""
+    if not FFmpegFrameSource.available():
+        return None
+    probe = OpenCVFrameSource(video_path)
+    probe.close()
+    if probe.meta is None:
+        return None
+    out_fps = _ffmpeg_out_fps(probe.meta, sample_every_n_frames, max_frames, sample_fps)
+    source = FFmpegFrameSource(video_path, out_fps, short_side=analysis_short_side)
+    if not source.opened:
+        return None
+
+    tap = _make_feature_tap(sampling, sample_every_n_frames)
+    try:
+        frames, close = iter_frames(source, None, prefetch=prefetch)
+    except OSError:
+        return None
+    try:
+        for idx, gray in frames:
+            tap.consume(SampledFrame(idx, idx / source.meta.fps, None, gray=gray, scale=source.scale))
+    except OSError:
+        return None
+    finally:
+        close()
+        source.close()
+    if not tap._t:
+        # ffmpeg produced nothing (unsupported input?) -> let OpenCV try
+        return None
+    return tap.result(source.meta)
+
+
+def analyze_video(
+    video_path: str,
+    sample_every_n_frames: int = 5,
+    max_frames: int | None = None,
+    sample_fps: float | None = None,
+    analysis_short_side: int | None = None,
+    workers: int = 1,
+    prefetch: int | None = None,
+    backend: str | None = None,
+    sampling: str = "stride",
+    extra_taps=(),
+) -> VideoAnalysis | None:
+    """
+    Single decode pass over `video_path`. Extra taps (e.g. PersonRefCollector)
+    share the same decoded frames. Returns None if the video can't be opened.
+
+    `max_frames` / `sample_fps` replace the fixed stride with a frame budget, so
+    long or high-fps sources cost a bounded number of decoded frames.
+    `analysis_short_side` runs brightness/diff/Canny/Haar on a downscaled copy
+    (e.g. 360 px short side) instead of full-resolution frames.
+    `workers` > 1 splits the sample plan into time ranges analysed in separate
+    processes (each seeks its own capture); the merged result matches the
+    serial pass. Stateful extra taps need one ordered pass, so they keep the
+    serial path.
+    `prefetch` sets the background decode queue depth (0 disables it).
+    `backend="ffmpeg"` decodes through an ffmpeg rawvideo pipe (fps decimation,
+    scaling and gray conversion done by ffmpeg); it needs no BGR frames, so it is
+    used only without extra taps, and falls back to OpenCV when ffmpeg is missing.
+    `sampling="adaptive"` analyses a coarse stride and densifies to every N-th
+    frame only around scene changes (see AdaptiveFeatureTap); frame budgets and
+    sharding don't apply in that mode.
+    """
+    adaptive = sampling == "adaptive"
+    if adaptive:
+        max_frames = sample_fps = None
+    backend = backend or DEFAULT_VIDEO_BACKEND
+    if backend == "ffmpeg" and not extra_taps:
+        res = _analyze_ffmpeg(
+            video_path, sample_every_n_frames, max_frames, sample_fps, analysis_short_side, prefetch, sampling
+        )
+        if res is not None:
+            return res
+
+    if workers > 1 and not extra_taps and not adaptive:
+        meta = probe_video_meta(video_path)
+        if meta is None:
+            return None
+        plan = plan_sample_indices(meta, sample_every_n_frames, max_frames, sample_fps)
+        if plan is None and meta.frame_count > 0:
+            stride = max(1, int(sample_every_n_frames))
+            plan = np.arange(stride - 1, meta.frame_count, stride, dtype=np.int64)
+        if plan is not None and len(plan) >= 2 * workers:
+            res = _analyze_sharded(video_path, meta, plan, workers, analysis_short_side, prefetch)
+            if res is not None:
+                return res
+
+    tap = _make_feature_tap(sampling, sample_every_n_frames, max_frames, sample_fps)
+    meta = decode_pass(
+        video_path,
+        [tap, *extra_taps],
+        analysis_short_side=analysis_short_side,
+        prefetch=prefetch,
+    )
+    if meta is None:
+        return None
+    return tap.result(meta)
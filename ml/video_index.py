@@ -0,0 +1,132 @@
+"""
+On-disk per-second timeline for analysed videos.
+
+Stored next to the video as `<name>.timeline.npy` (TIMELINE_DTYPE rows, loaded
+with mmap_mode="r") plus `<name>.timeline.json` (meta, sampling params, source
+size/mtime). Reruns on the same footage (resubmitted jobs, --resume-from-kie)
+read the index instead of decoding the video again.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict
+from pathlib import Path
+import json
+import os
+import numpy as np
+
+from ml.frame_source import VideoMeta
+from ml.video_engine import (
+    DEFAULT_VIDEO_BACKEND,
+    TIMELINE_DTYPE,
+    VideoTimeline,
+    analyze_video,
+)
+
+TIMELINE_INDEX_VERSION = 1
+USE_TIMELINE_INDEX = os.getenv("VIDEO_TIMELINE_INDEX", "1") != "0"
+
+
+def index_paths(video_path: str) -> tuple[Path, Path]:
+    p = Path(video_path)
+    return p.with_name(p.name + ".timeline.npy"), p.with_name(p.name + ".timeline.json")
+
+
+def _source_key(video_path: str) -> dict:
+    st = os.stat(video_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_timeline(video_path: str, params: dict) -> VideoTimeline | None:
+    """Memory-mapped timeline if a fresh index with the same params exists."""
+    npy_path, json_path = index_paths(video_path)
+    try:
+        info = json.loads(json_path.read_text(encoding="utf-8"))
+        if info.get("version") != TIMELINE_INDEX_VERSION:
+            return None
+        if info.get("source") != _source_key(video_path) or info.get("params") != params:
+            return None
+        bins = np.load(npy_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if bins.dtype != TIMELINE_DTYPE:
+        return None
+    return VideoTimeline(meta=VideoMeta(**info["meta"]), bins=bins)
+
+
+def save_timeline(video_path: str, timeline: VideoTimeline, params: dict) -> bool:
+    """Write the index next to the video; False if the folder isn't writable."""
+    npy_path, json_path = index_paths(video_path)
+    info = {
+        "version": TIMELINE_INDEX_VERSION,
+        "source": _source_key(video_path),
+        "params": params,
+        "meta": asdict(timeline.meta),
+    }
+    try:
+        tmp = npy_path.with_name(npy_path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(timeline.bins, dtype=TIMELINE_DTYPE))
+        os.replace(tmp, npy_path)
+        # json last: it is what marks the index as valid
+        tmp = json_path.with_name(json_path.name + ".tmp")
+        tmp.write_text(json.dumps(info), encoding="utf-8")
+        os.replace(tmp, json_path)
+    except OSError:
+        return False
+    return True
+
+
+def load_or_build_timeline(
+    video_path: str,
+    sample_every_n_frames: int = 5,
+    max_frames: int | None = None,
+    sample_fps: float | None = None,
+    analysis_short_side: int | None = None,
+    workers: int = 1,
+    prefetch: int | None = None,
+    backend: str | None = None,
+    sampling: str = "stride",
+    extra_taps=(),
+    use_index: bool | None = None,
+) -> VideoTimeline | None:
+    """
+    Timeline from the on-disk index when it matches the file and sampling
+    params, otherwise from a fresh analyze_video pass (which refreshes the
+    index). Extra taps need decoded frames, so they always decode.
+    """
+    if use_index is None:
+        use_index = USE_TIMELINE_INDEX
+    params = {
+        "sample_every_n_frames": int(sample_every_n_frames),
+        "max_frames": max_frames,
+        "sample_fps": sample_fps,
+        "analysis_short_side": analysis_short_side,
+        "backend": backend or DEFAULT_VIDEO_BACKEND,
+        "sampling": sampling,
+    }
+    if use_index and not extra_taps:
+        try:
+            timeline = load_timeline(video_path, params)
+        except OSError:
+            timeline = None
+        if timeline is not None:
+            return timeline
+
+    analysis = analyze_video(
+        video_path,
+        sample_every_n_frames=sample_every_n_frames,
+        max_frames=max_frames,
+        sample_fps=sample_fps,
+        analysis_short_side=analysis_short_side,
+        workers=workers,
+        prefetch=prefetch,
+        backend=backend,
+        sampling=sampling,
+        extra_taps=extra_taps,
+    )
+    if analysis is None:
+        return None
+    timeline = analysis.timeline()
+    if use_index:
+        save_timeline(video_path, timeline, params)
+    return timeline
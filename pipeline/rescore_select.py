@@ -1,29 +1,73 @@
 from pathlib import Path
 from ml.feature_video import extract_video_features
-try:
-    from sentence_transformers import SentenceTransformer
-except Exception:
-    SentenceTransformer = None
+from ml.video_engine import DEFAULT_ANALYSIS_SHORT_SIDE
+from ml.embedding_cache import cached_embeddings
+from ml.scoring_service import EMBED_MODEL, embed_available, get_client, load_embedder
 import numpy as np
 import os
+import threading
 
-# load once (biar cepat); fall back if model can't load (e.g., low memory)
+# Embedding model: nothing loads at import (runs that never score skip torch
+# entirely). The first _encode picks the scoring service if it has the model
+# warm, else loads it in-process once; warm_up_embedder() does that early on
+# a background thread.
 _EMB = None
-if SentenceTransformer is not None:
-    try:
-        _EMB = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    except Exception:
-        _EMB = None
-
-def _sim(a: str, b: str) -> float:
-    """Cosine similarity 0..1-ish."""
-    if not a or not b:
-        return 0.0
-    if _EMB is None:
-        return 0.0
-    ea = _EMB.encode([a], normalize_embeddings=True)[0]
-    eb = _EMB.encode([b], normalize_embeddings=True)[0]
-    return float(np.dot(ea, eb))
+_REMOTE_EMB = False
+_emb_ready = False
+_emb_lock = threading.Lock()
+
+def _embedder():
+    """Local SentenceTransformer, or None when using the service / unavailable."""
+    global _EMB, _REMOTE_EMB, _emb_ready
+    if _emb_ready:
+        return _EMB
+    with _emb_lock:
+        if not _emb_ready:
+            _REMOTE_EMB = embed_available()
+            # load once (biar cepat); fall back if model can't load (e.g., low memory)
+            _EMB = None if _REMOTE_EMB else load_embedder()
+            _emb_ready = True
+    return _EMB
+
+def warm_up_embedder() -> threading.Thread:
+    """Load the embedding model on a daemon thread (e.g. while waiting on the LLM)."""
+    t = threading.Thread(target=_embedder, name="embed-warmup", daemon=True)
+    t.start()
+    return t
+
+def _encode(texts: list[str]) -> np.ndarray | None:
+    """Normalized embeddings from the scoring service, else the local model."""
+    global _EMB, _REMOTE_EMB
+    emb = _embedder()
+    if _REMOTE_EMB:
+        try:
+            return get_client().embed(texts)
+        except (OSError, RuntimeError) as e:
+            print(f"[SCORING] embed via service failed ({e}); loading model in-process")
+            with _emb_lock:
+                if _REMOTE_EMB:
+                    _REMOTE_EMB = False
+                    _EMB = load_embedder()
+            emb = _EMB
+    if emb is None:
+        return None
+    return emb.encode(texts, normalize_embeddings=True)
+
+def _relevance(target: str, prompts: list[str]) -> np.ndarray:
+    """
+    Cosine similarity 0..1-ish of each prompt to `target` (0 for empty ones).
+    Target and prompts are embedded in one batch through the embedding cache,
+    then scored with a single matrix-vector product.
+    """
+    rel = np.zeros(len(prompts), dtype=np.float32)
+    idx = [i for i, p in enumerate(prompts) if p]
+    if not target or not idx:
+        return rel
+    emb = cached_embeddings(EMBED_MODEL, [target] + [prompts[i] for i in idx], _encode)
+    if emb is None:
+        return rel
+    rel[idx] = emb[1:] @ emb[0]
+    return rel
 
 def _video_path(v):
     # v can be dict or str
@@ -43,6 +87,7 @@ def select_best(videos, scorer, base_features):
     # base_features["_target_text"] = f"{platform}\n{mood}\n{caption}\n{audio_style}\n{lyrics}"
     target_text = (base_features.get("_target_text") or "").strip()
 
+    candidates = []
     for v in videos:
         p = _video_path(v)
         if not p:
@@ -51,20 +96,21 @@ def select_best(videos, scorer, base_features):
             # skip yang belum benar-benar ada
             continue
 
-        vf = extract_video_features(p)
-        features = {**base_features, **vf}
+        vf = extract_video_features(p, analysis_short_side=DEFAULT_ANALYSIS_SHORT_SIDE)
+        candidates.append((v, {**base_features, **vf}))
 
-        # ML virality score (0..100 assumed)
-        ml_score = float(scorer.predict(features)["virality_score"])
+    # ML virality score (0..100 assumed), one model call for all candidates
+    preds = scorer.predict_batch([features for _, features in candidates])
 
-        # Prompt kandidat (dari LLM)
-        prompt_text = ""
-        if isinstance(v, dict):
-            prompt_text = (v.get("prompt") or "").strip()
+    # Prompt kandidat (dari LLM)
+    prompts = [(v.get("prompt") or "").strip() if isinstance(v, dict) else "" for v, _ in candidates]
 
-        # Semantic relevance 0..1
-        rel = _sim(target_text, prompt_text) if (target_text and prompt_text) else 0.0
-        rel_score = rel * 100.0
+    # Semantic relevance 0..1, all candidates in one batch
+    rels = _relevance(target_text, prompts)
+
+    for (v, features), pred, prompt_text, rel in zip(candidates, preds, prompts, rels):
+        ml_score = float(pred["virality_score"])
+        rel_score = float(rel) * 100.0
 
         # Hard penalty untuk out-of-context (opsional tapi berguna)
         ptext_l = prompt_text.lower()